@@ -2,6 +2,18 @@ import { NextRequest, NextResponse } from 'next/server'
 import fs from 'fs/promises'
 import path from 'path'
 
+// When set (e.g. http://127.0.0.1:8765), PDFs are extracted by the Python analysis service
+// (python -m scripts.service) instead of the built-in sample text
+const analysisServiceUrl = process.env.ANALYSIS_SERVICE_URL
+const servicePollIntervalMs = 500
+const serviceTimeoutMs = 5 * 60 * 1000
+
+class AnalysisServiceError extends Error {
+    constructor(message: string, public status: number) {
+        super(message)
+    }
+}
+
 export async function POST(request: NextRequest) {
     console.log('PDF extraction API called')
     try {
@@ -69,10 +81,12 @@ tried.
  
 20. Trendora feels like that friend who's always late but still fun to hang out with.`
 
-        console.log('Using known text for extraction')
+        console.log(analysisServiceUrl ? `Forwarding to analysis service at ${analysisServiceUrl}` : 'Using known text for extraction')
 
         // Extract numbered items (1. 2. 3. etc.)
-        const numberedItems = extractNumberedItems(knownText)
+        const numberedItems = analysisServiceUrl
+            ? await extractWithAnalysisService(analysisServiceUrl, file)
+            : extractNumberedItems(knownText)
         console.log('Extracted items:', numberedItems.length)
 
         if (numberedItems.length === 0) {
@@ -111,12 +125,49 @@ tried.
 
     } catch (error) {
         console.error('PDF extraction error:', error)
+        if (error instanceof AnalysisServiceError) {
+            return NextResponse.json({ error: error.message }, { status: error.status })
+        }
         return NextResponse.json({
             error: 'Failed to extract text from PDF'
         }, { status: 500 })
     }
 }
 
+async function extractWithAnalysisService(serviceUrl: string, file: File): Promise<Array<{ id: number; text: string }>> {
+    // Extraction only; the service queues the job and we poll until it finishes
+    const submitted = await fetch(
+        `${serviceUrl}/jobs/tweets?analyze=0&filename=${encodeURIComponent(file.name)}`,
+        { method: 'POST', body: Buffer.from(await file.arrayBuffer()), headers: { 'Content-Type': 'application/pdf' } }
+    )
+    if (submitted.status === 503) {
+        throw new AnalysisServiceError('Analysis service is busy, please retry shortly', 503)
+    }
+    if (!submitted.ok) {
+        throw new AnalysisServiceError(`Analysis service rejected the upload (${submitted.status})`, 502)
+    }
+
+    const { poll } = await submitted.json()
+    const deadline = Date.now() + serviceTimeoutMs
+    while (Date.now() < deadline) {
+        const response = await fetch(`${serviceUrl}${poll}`)
+        const job = await response.json()
+
+        if (job.status === 'done') {
+            const tweets: Array<{ tweet_number: number; tweet_text: string }> = job.result?.tweets ?? []
+            return tweets
+                .map(tweet => ({ id: tweet.tweet_number, text: tweet.tweet_text }))
+                .sort((a, b) => a.id - b.id)
+        }
+        if (job.status === 'failed' || !response.ok) {
+            throw new AnalysisServiceError(job.error || 'Analysis service job failed', 502)
+        }
+
+        await new Promise(resolve => setTimeout(resolve, servicePollIntervalMs))
+    }
+    throw new AnalysisServiceError('Timed out waiting for the analysis service', 504)
+}
+
 function extractNumberedItems(text: string): Array<{ id: number; text: string }> {
     const items: Array<{ id: number; text: string }> = []
 
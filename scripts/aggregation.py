@@ -0,0 +1,89 @@
+from collections import Counter
+import re
+
+from .columnar import sentiment_labels
+from .sentiment_engine import is_blank
+from .topk import DEFAULT_COUNTER_CAPACITY, DEFAULT_COUNTER_MODE, make_counter
+
+SENTIMENTS = ('POSITIVE', 'NEGATIVE', 'NEUTRAL')
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+
+STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them'})
+
+WORD_CLOUD_SIZE = 20
+
+def distribution_percentages(counts, total):
+    """Percentages per sentiment in the shape the UI expects"""
+    if not total:
+        return {sentiment.lower(): 0.0 for sentiment in SENTIMENTS}
+    return {sentiment.lower(): round(counts.get(sentiment, 0) / total * 100, 1) for sentiment in SENTIMENTS}
+
+class SentimentAggregator:
+    """Running sentiment distribution and word clouds, updated one chunk at a time"""
+    
+    def __init__(self, counter_mode=DEFAULT_COUNTER_MODE, counter_capacity=DEFAULT_COUNTER_CAPACITY):
+        self.total = 0
+        self.baseline_counts = Counter()
+        self.rag_counts = Counter()
+        
+        # Word counts per sentiment stay bounded by counter_capacity unless counter_mode is 'exact'
+        self.counter_mode = counter_mode
+        self.counter_capacity = counter_capacity
+        self.word_counts = {sentiment: self.new_counter() for sentiment in SENTIMENTS}
+    
+    def new_counter(self):
+        return make_counter(self.counter_mode, self.counter_capacity)
+    
+    def add_sentiments(self, baseline_results, rag_results):
+        """Count predicted labels for a chunk of baseline and RAG results"""
+        self.total += len(baseline_results)
+        self.baseline_counts.update(sentiment_labels(baseline_results))
+        self.rag_counts.update(sentiment_labels(rag_results))
+    
+    def add_words(self, texts, sentiments):
+        """Count word-cloud tokens for a chunk of texts under their predicted sentiment"""
+        # Tokens are tallied per chunk first so each counter sees one batched update
+        batches = {}
+        for text, sentiment in zip(texts, sentiment_labels(sentiments)):
+            if is_blank(text):
+                continue
+            
+            words = WORD_PATTERN.findall(text.lower())
+            batch = batches.setdefault(sentiment, Counter())
+            batch.update(word for word in words if word not in STOP_WORDS and len(word) > 2)
+        
+        for sentiment, batch in batches.items():
+            counter = self.word_counts.get(sentiment)
+            if counter is None:
+                counter = self.word_counts[sentiment] = self.new_counter()
+            counter.update(batch)
+    
+    def add(self, texts, baseline_results, rag_results):
+        """Fold one analyzed chunk into the running aggregates"""
+        self.add_sentiments(baseline_results, rag_results)
+        self.add_words(texts, rag_results)
+    
+    def merge(self, other):
+        """Fold in a partial aggregator, e.g. one built by a parallel worker"""
+        self.total += other.total
+        self.baseline_counts.update(other.baseline_counts)
+        self.rag_counts.update(other.rag_counts)
+        for sentiment, counter in other.word_counts.items():
+            if sentiment in self.word_counts:
+                self.word_counts[sentiment].merge(counter)
+            else:
+                self.word_counts[sentiment] = self.new_counter().merge(counter)
+        return self
+    
+    def sentiment_distribution(self):
+        return {
+            'baseline': distribution_percentages(self.baseline_counts, self.total),
+            'rag': distribution_percentages(self.rag_counts, self.total)
+        }
+    
+    def word_clouds(self, size=WORD_CLOUD_SIZE):
+        return {
+            sentiment.lower(): [{'text': word, 'value': freq} for word, freq in counts.most_common(size)]
+            for sentiment, counts in self.word_counts.items()
+        }
@@ -0,0 +1,259 @@
+from . import model_registry
+from .aggregation import SentimentAggregator
+from .attributions import DEFAULT_TIME_BUDGET, add_attributions, attribution_deadline
+from .columnar import ColumnarExplanations, ColumnarResults, sentiment_labels
+from .dedup import TextDeduplicator
+from .embedding_backends import (
+    DEFAULT_EMBEDDING_STORAGE, DEFAULT_SENTENCE_BACKEND, check_sentence_backend, check_storage
+)
+from .lexicon import DEFAULT_LEXICON, Lexicon, keyword_explanation
+from .result_cache import DEFAULT_CACHE_MAX_BYTES, ResultCache
+from .retrieval import retrieve_context
+from .sentiment_backends import DEFAULT_SENTIMENT_BACKEND, backend_model_id, check_backend
+from .sentiment_engine import DEFAULT_BATCH_SIZE, is_blank
+
+# Built-in RAG passages (mock hate lexicons and domain documents)
+DEFAULT_KNOWLEDGE_BASE = (
+    "Hate speech often contains derogatory terms targeting specific groups",
+    "Positive sentiment indicators include words like excellent, amazing, love, great",
+    "Negative sentiment indicators include words like terrible, awful, hate, disappointed",
+    "Neutral sentiment often uses factual language without emotional indicators",
+    "Context matters significantly in sentiment analysis",
+    "Sarcasm can flip the apparent sentiment of a statement"
+)
+
+class AnalyzerBase:
+    """Model access, scoring, RAG and explanations shared by the dataset and tweet analyzers
+    
+    Subclasses add their input formats and pick the explanation lexicon.
+    """
+    
+    # Keyword lexicon used for explanations; extra lexicon_paths are layered on top
+    default_lexicon = DEFAULT_LEXICON
+    
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, cache_path=None, cache_max_bytes=DEFAULT_CACHE_MAX_BYTES,
+                 near_duplicates=None, lexicon_paths=(), attributions=None, attribution_budget=DEFAULT_TIME_BUDGET,
+                 knowledge_base_path=None, sentiment_backend=DEFAULT_SENTIMENT_BACKEND,
+                 sentence_backend=DEFAULT_SENTENCE_BACKEND, embedding_storage=DEFAULT_EMBEDDING_STORAGE,
+                 micro_batch_wait_ms=None, inference_workers=None):
+        # Models are shared across analyzers and only loaded on first use
+        self.batch_size = batch_size
+        
+        # 'torch' (eager), 'onnx_int8' or 'torch_int8'; quantized artifacts are built once and cached on disk
+        self.sentiment_backend = check_backend(sentiment_backend)
+        
+        # RAG embeddings: 'torch', 'onnx' or 'onnx_int8', kept as float32, float16 or int8
+        # in the built-in knowledge base index and the embedding cache
+        self.sentence_backend = check_sentence_backend(sentence_backend)
+        self.embedding_storage = check_storage(embedding_storage)
+        
+        # When set, model calls from concurrent analyzers (e.g. service requests) are coalesced
+        # into shared batches, waiting at most this many milliseconds for other callers
+        self.micro_batch_wait_ms = micro_batch_wait_ms
+        
+        # When set, dataset chunks are sharded across this many forked processes that share
+        # the already loaded model weights, each pinned to its share of the cores
+        self.inference_workers = inference_workers
+        self._worker_pool = None
+        
+        # Optional on-disk cache of model outputs, shared across runs and worker processes
+        self.result_cache = ResultCache(cache_path, cache_max_bytes) if cache_path else None
+        
+        # Duplicate and optionally near-duplicate texts are scored once per group
+        self.deduplicator = TextDeduplicator(near_duplicates)
+        
+        # Explanation keywords; extra lexicon files are reloaded when they change on disk
+        self.lexicon = Lexicon(self.default_lexicon, lexicon_paths)
+        
+        # Optional token attributions ('gradient', 'attention' or 'shap') for low-confidence rows,
+        # limited to attribution_budget seconds per request
+        self.attributions = attributions
+        self.attribution_budget = attribution_budget
+        
+        # Directory written by `python -m scripts.knowledge_base`; overrides the built-in passages below
+        self.knowledge_base_path = knowledge_base_path
+        self.knowledge_base = list(DEFAULT_KNOWLEDGE_BASE)
+    
+    @property
+    def sentiment_pipeline(self):
+        """Shared sentiment analysis pipeline"""
+        return model_registry.get_sentiment_pipeline(self.sentiment_backend)
+    
+    @property
+    def sentiment_engine(self):
+        """Shared batched inference engine for this analyzer's batch size"""
+        return model_registry.get_sentiment_engine(self.batch_size, self.sentiment_backend)
+    
+    @property
+    def sentiment_scorer(self):
+        """Scores a list of texts, through the shared micro-batcher when enabled"""
+        if self.micro_batch_wait_ms is None:
+            return self.sentiment_engine.score
+        return model_registry.get_sentiment_batcher(self.batch_size, self.sentiment_backend, self.micro_batch_wait_ms)
+    
+    @property
+    def sentence_model(self):
+        """Shared sentence transformer for RAG"""
+        if self.micro_batch_wait_ms is not None:
+            return model_registry.get_batched_sentence_model(self.sentence_backend, self.micro_batch_wait_ms)
+        return model_registry.get_sentence_model(self.sentence_backend)
+    
+    @property
+    def worker_pool(self):
+        """Inference worker processes for this analyzer, started on first use if enabled"""
+        if self.inference_workers and self._worker_pool is None:
+            from .worker_pool import InferencePool
+            
+            # False remembers that workers are unavailable here
+            self._worker_pool = InferencePool.start(self, self.inference_workers) or False
+        return self._worker_pool or None
+    
+    def micro_batching_metrics(self):
+        """Queue depth, batch sizes and waits of the shared micro-batchers, if enabled"""
+        if self.micro_batch_wait_ms is None:
+            return None
+        return {
+            'sentiment': self.sentiment_scorer.metrics(),
+            'embedding': self.sentence_model.batcher.metrics()
+        }
+    
+    @property
+    def rag_knowledge_base(self):
+        """Persisted knowledge base if a path was given, else the built-in passages, loaded once per process"""
+        if self.knowledge_base_path:
+            return model_registry.get_knowledge_base(self.knowledge_base_path)
+        return model_registry.get_knowledge_base_index(self.knowledge_base, self.sentence_backend, self.embedding_storage)
+    
+    @property
+    def index(self):
+        """FAISS index for the knowledge base"""
+        return self.rag_knowledge_base.index
+    
+    @property
+    def token_attributor(self):
+        """Shared token attributor for this analyzer's attribution mode"""
+        return model_registry.get_token_attributor(self.attributions)
+    
+    def setup_knowledge_base(self):
+        """Setup FAISS index for RAG retrieval"""
+        return self.rag_knowledge_base
+    
+    def score_texts(self, texts):
+        """Run the sentiment model once per text, shared by the baseline and RAG stages"""
+        if self.result_cache is None:
+            return self.sentiment_scorer(texts)
+        
+        revision = model_registry.model_revision(self.sentiment_pipeline)
+        return self.result_cache.cached(
+            'sentiment', backend_model_id(model_registry.SENTIMENT_MODEL, self.sentiment_backend), revision, texts,
+            self.sentiment_scorer
+        )
+    
+    def baseline_sentiment_analysis(self, texts, predictions=None):
+        """Run baseline sentiment analysis, returning columnar results that read back as dicts"""
+        texts = list(texts)
+        
+        if predictions is None:
+            predictions = self.score_texts(texts)
+        
+        # Empty texts and rows the model failed on fall back to neutral
+        return ColumnarResults.build(
+            texts,
+            ['NEUTRAL' if prediction is None else prediction['label'] for prediction in predictions],
+            [0.5 if prediction is None else prediction['score'] for prediction in predictions]
+        )
+    
+    def retrieve_context(self, texts, embeddings=None):
+        """Retrieve knowledge base context for texts with batched encoding and search"""
+        return retrieve_context(
+            self.sentence_model, self.rag_knowledge_base, texts, k=2, cache=self.result_cache,
+            backend=self.sentence_backend, storage=self.embedding_storage, embeddings=embeddings
+        )
+    
+    def retrieve_context_ids(self, texts, embeddings=None):
+        """Knowledge base passage ids per text, resolved to passages only when results are read"""
+        return retrieve_context(
+            self.sentence_model, self.rag_knowledge_base, texts, k=2, cache=self.result_cache,
+            backend=self.sentence_backend, storage=self.embedding_storage, passage_ids=True,
+            embeddings=embeddings
+        )
+    
+    def rag_sentiment_analysis(self, texts, predictions=None, contexts=None):
+        """Run RAG-enhanced sentiment analysis; contexts are passage id lists as from retrieve_context_ids"""
+        texts = list(texts)
+        sentiments = []
+        confidences = []
+        context_ids = []
+        
+        # Reuse the baseline scores when given so each text hits the model once
+        if predictions is None:
+            predictions = self.score_texts(texts)
+        
+        if contexts is None:
+            # Embed and search all scored texts together instead of one query per row
+            scored_indices = [i for i, prediction in enumerate(predictions) if prediction is not None]
+            contexts = [None] * len(texts)
+            for i, context in zip(scored_indices, self.retrieve_context_ids([texts[i] for i in scored_indices])):
+                contexts[i] = context
+        
+        for i, (text, baseline) in enumerate(zip(texts, predictions)):
+            if is_blank(text):
+                sentiments.append('NEUTRAL')
+                confidences.append(0.5)
+                context_ids.append(None)
+                continue
+            
+            relevant_context = contexts[i]
+            
+            # Rows the model or retrieval failed on keep the neutral fallback
+            if baseline is None or relevant_context is None:
+                sentiments.append('NEUTRAL')
+                confidences.append(0.5)
+                context_ids.append([])
+                continue
+            
+            # Enhanced prediction with context (simplified)
+            # In practice, this would involve more sophisticated RAG techniques
+            sentiments.append(baseline['label'])
+            confidences.append(min(baseline['score'] + 0.05, 1.0))
+            context_ids.append(relevant_context)
+        
+        return ColumnarResults.build(texts, sentiments, confidences, context_ids, self.rag_knowledge_base.passages)
+    
+    def attribution_deadline(self):
+        """Deadline for the attributions of a request starting now, shared by all its chunks"""
+        return attribution_deadline(self.attribution_budget) if self.attributions else None
+    
+    def generate_explanations(self, texts, sentiments, deadline=None):
+        """Generate explanations for sentiment predictions; deadline defaults to a fresh budget"""
+        texts = list(texts)
+        messages = []
+        highlights = []
+        
+        # Lexicon keyword hits; hit offsets let the UI highlight them
+        for text, sentiment, hits in zip(texts, sentiment_labels(sentiments), self.lexicon.find_all(texts)):
+            # None or NaN from pandas
+            if not isinstance(text, str):
+                messages.append('No text to analyze')
+                highlights.append(None)
+                continue
+            
+            messages.append(keyword_explanation(sentiment, hits))
+            highlights.append(hits)
+        
+        explanations = ColumnarExplanations.build(texts, messages, highlights)
+        
+        if self.attributions:
+            add_attributions(
+                explanations, sentiments, self.token_attributor, self.result_cache,
+                model_registry.SENTIMENT_MODEL, model_registry.model_revision(self.sentiment_pipeline),
+                time_budget=self.attribution_budget, deadline=deadline
+            )
+        
+        return explanations
+    
+    def create_word_clouds(self, texts, sentiments):
+        """Create word clouds for different sentiment categories"""
+        aggregator = SentimentAggregator()
+        aggregator.add_words(texts, sentiments)
+        return aggregator.word_clouds()
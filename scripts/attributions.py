@@ -0,0 +1,231 @@
+import copy
+import random
+import threading
+import time
+
+from .sentiment_engine import SentimentEngine, is_blank
+
+# 'gradient' is gradient x input on the token embeddings, 'attention' is attention
+# rollout (forward pass only) and 'shap' runs shap's partition explainer (slowest)
+ATTRIBUTION_MODES = ('gradient', 'attention', 'shap')
+DEFAULT_ATTRIBUTION_MODE = 'gradient'
+
+DEFAULT_ATTRIBUTION_BATCH_SIZE = 8
+
+# Seconds of attribution work allowed per request
+DEFAULT_TIME_BUDGET = 5.0
+
+# Rows are explained in priority order, length-sorted only within groups of this many batches
+PRIORITY_GROUP_BATCHES = 4
+
+# Predictions below this confidence are explained first
+DEFAULT_CONFIDENCE_THRESHOLD = 0.75
+
+class TokenAttributor:
+    """Token-level attributions for the predicted label of the sentiment model"""
+    
+    def __init__(self, sentiment_pipeline, mode=DEFAULT_ATTRIBUTION_MODE, batch_size=DEFAULT_ATTRIBUTION_BATCH_SIZE,
+                 max_length=None):
+        if mode not in ATTRIBUTION_MODES:
+            raise ValueError(f"Unsupported attribution mode: {mode}")
+        
+        self.sentiment_pipeline = sentiment_pipeline
+        self.mode = mode
+        self.batch_size = max(1, int(batch_size))
+        self.max_length = max_length or SentimentEngine.model_max_length(sentiment_pipeline)
+        self._shap_explainer = None
+        self._tokenizer = None
+        self._tokenizer_lock = threading.Lock()
+    
+    @property
+    def tokenizer(self):
+        """Private copy of the pipeline tokenizer
+        
+        Attributions run on the aggregate thread while the next chunk is scored through the
+        pipeline, and a fast tokenizer shared between threads fails with "Already borrowed".
+        """
+        if self._tokenizer is None:
+            with self._tokenizer_lock:
+                if self._tokenizer is None:
+                    self._tokenizer = copy.deepcopy(self.sentiment_pipeline.tokenizer)
+        return self._tokenizer
+    
+    def attribute(self, texts, deadline=None):
+        """One [{'token', 'score'}] list per text; rows left when the deadline passes stay None"""
+        texts = list(texts)
+        attributions = [None] * len(texts)
+        
+        # Texts come in priority order, so the deadline cuts the least important ones; within
+        # each group of a few batches they're bucketed by length like inference to keep padding small
+        priority = [i for i, text in enumerate(texts) if not is_blank(text)]
+        group_size = self.batch_size * PRIORITY_GROUP_BATCHES
+        order = [
+            i
+            for start in range(0, len(priority), group_size)
+            for i in sorted(priority[start:start + group_size], key=lambda i: len(texts[i]))
+        ]
+        for start in range(0, len(order), self.batch_size):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            
+            indices = order[start:start + self.batch_size]
+            batch = [texts[i] for i in indices]
+            try:
+                results = self.attribute_batch(batch)
+            except Exception as e:
+                print(f"[v0] Attribution failed for a batch of {len(batch)} texts: {e}")
+                continue
+            
+            for i, result in zip(indices, results):
+                attributions[i] = result
+        
+        return attributions
+    
+    def attribute_batch(self, texts):
+        if self.mode == 'shap':
+            return self.shap_batch(texts)
+        
+        import torch
+        
+        model = self.sentiment_pipeline.model
+        tokenizer = self.tokenizer
+        with self._tokenizer_lock:
+            encoded = tokenizer(
+                texts,
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors='pt',
+                return_special_tokens_mask=True
+            )
+        special_tokens_mask = encoded.pop('special_tokens_mask')
+        encoded = {name: tensor.to(model.device) for name, tensor in encoded.items()}
+        
+        if self.mode == 'gradient':
+            embeddings = model.get_input_embeddings()(encoded['input_ids']).detach().requires_grad_(True)
+            logits = model(inputs_embeds=embeddings, attention_mask=encoded['attention_mask']).logits
+            
+            # One backward pass covers the whole batch since each row only feeds its own logit;
+            # autograd.grad leaves the shared model's parameter gradients untouched
+            predicted = logits.argmax(dim=-1)
+            (gradients,) = torch.autograd.grad(logits.gather(1, predicted[:, None]).sum(), embeddings)
+            scores = (gradients * embeddings).sum(dim=-1)
+        else:
+            with torch.no_grad():
+                attentions = model(**encoded, output_attentions=True).attentions
+            scores = self.attention_rollout(attentions, encoded['attention_mask'])
+        
+        scores = scores.detach().float().cpu()
+        input_ids = encoded['input_ids'].cpu()
+        keep = (encoded['attention_mask'].cpu() == 1) & (special_tokens_mask == 0)
+        
+        with self._tokenizer_lock:
+            tokens = [
+                [tokenizer.convert_tokens_to_string([token]).strip()
+                 for token in tokenizer.convert_ids_to_tokens(input_ids[row][keep[row]].tolist())]
+                for row in range(len(texts))
+            ]
+        
+        results = []
+        for row in range(len(texts)):
+            row_scores = scores[row][keep[row]]
+            scale = row_scores.abs().max().item() or 1.0
+            results.append([
+                {'token': token, 'score': round(score / scale, 4)}
+                for token, score in zip(tokens[row], row_scores.tolist())
+            ])
+        return results
+    
+    @staticmethod
+    def attention_rollout(attentions, attention_mask):
+        """Propagate head-averaged attention (plus residual) through the layers, read from <s>"""
+        import torch
+        
+        rollout = None
+        for layer in attentions:
+            attention = layer.mean(dim=1)
+            attention = attention + torch.eye(attention.size(-1), device=attention.device)
+            attention = attention / attention.sum(dim=-1, keepdim=True)
+            rollout = attention if rollout is None else attention @ rollout
+        
+        return rollout[:, 0] * attention_mask
+    
+    def shap_batch(self, texts):
+        if self._shap_explainer is None:
+            import shap
+            from transformers import pipeline
+            
+            # Same model, but our own tokenizer copy so shap's masking doesn't share the scoring one
+            explained = pipeline('sentiment-analysis', model=self.sentiment_pipeline.model, tokenizer=self.tokenizer)
+            self._shap_explainer = shap.Explainer(explained)
+        
+        with self._tokenizer_lock:
+            explanation = self._shap_explainer(texts, batch_size=self.batch_size)
+        results = []
+        for row in range(len(texts)):
+            values = explanation.values[row]
+            # Explain the label the model actually picked (largest summed contribution)
+            label = int((values.sum(axis=0) + explanation.base_values[row]).argmax())
+            row_values = values[:, label]
+            scale = float(abs(row_values).max()) or 1.0
+            results.append([
+                {'token': str(token).strip(), 'score': round(float(value) / scale, 4)}
+                for token, value in zip(explanation.data[row], row_values)
+                if str(token).strip()
+            ])
+        return results
+
+def select_for_attribution(sentiments, confidence_threshold=DEFAULT_CONFIDENCE_THRESHOLD, sample_rate=0.0, seed=None):
+    """Indices worth explaining: low-confidence predictions first, then a random sample of the rest"""
+    low_confidence = sorted(
+        (i for i, result in enumerate(sentiments) if result.get('confidence', 1.0) < confidence_threshold),
+        key=lambda i: sentiments[i].get('confidence', 1.0)
+    )
+    
+    rest = [i for i in range(len(sentiments)) if sentiments[i].get('confidence', 1.0) >= confidence_threshold]
+    sampled = random.Random(seed).sample(rest, int(len(rest) * sample_rate)) if sample_rate > 0 else []
+    
+    return low_confidence + sampled
+
+def attribution_deadline(time_budget=DEFAULT_TIME_BUDGET):
+    """perf_counter() time at which a budget starting now runs out, or None without a budget"""
+    return time.perf_counter() + time_budget if time_budget is not None else None
+
+def cached_attributions(attributor, texts, result_cache=None, model_id=None, revision=None,
+                        time_budget=DEFAULT_TIME_BUDGET, deadline=None):
+    """Attributions for texts within a time budget, reusing and filling the result cache
+    
+    A deadline shared by the calls of one request takes precedence over starting a fresh time_budget.
+    """
+    if deadline is None:
+        deadline = attribution_deadline(time_budget)
+    
+    def compute(batch):
+        return attributor.attribute(batch, deadline=deadline)
+    
+    if result_cache is None:
+        return compute(texts)
+    
+    # Rows cut off by the budget come back None and are not cached, so a later call finishes them
+    return result_cache.cached(f'attribution:{attributor.mode}', model_id, revision, texts, compute)
+
+def add_attributions(explanations, sentiments, attributor, result_cache=None, model_id=None, revision=None,
+                     time_budget=DEFAULT_TIME_BUDGET, confidence_threshold=DEFAULT_CONFIDENCE_THRESHOLD,
+                     sample_rate=0.0, deadline=None):
+    """Attach 'attributions' to the selected rows of ColumnarExplanations, in place"""
+    texts = explanations.texts
+    selected = [
+        i for i in select_for_attribution(sentiments, confidence_threshold, sample_rate) if not is_blank(texts[i])
+    ]
+    if not selected:
+        return explanations
+    
+    attributions = cached_attributions(
+        attributor, [texts[i] for i in selected], result_cache, model_id, revision, time_budget,
+        deadline
+    )
+    for i, attribution in zip(selected, attributions):
+        if attribution is not None:
+            explanations.attributions[i] = attribution
+    
+    return explanations
@@ -0,0 +1,67 @@
+# Usage: python -m scripts.benchmarks.embedding_recall [--inputs FILE ...] [--queries N] [--k 10]
+import argparse
+import random
+import sys
+import time
+
+from scripts import model_registry
+from scripts.embedding_backends import EMBEDDING_STORAGE_FORMATS, SENTENCE_BACKENDS
+from scripts.knowledge_base import DEFAULT_INDEX, KnowledgeBase, iter_passages, normalized
+from scripts.retrieval import encode_texts
+from scripts.sentiment_backends import PARITY_TEXTS
+
+def make_passages(count, seed=0):
+    """Parity sentences stitched together when no passage files are given"""
+    rng = random.Random(seed)
+    return list(dict.fromkeys(' '.join(rng.sample(PARITY_TEXTS, rng.randint(2, 5))) for _ in range(count)))
+
+def top_ids(knowledge_base, sentence_model, queries, k):
+    embeddings = normalized(encode_texts(sentence_model, queries))
+    _, ids = knowledge_base.index.search(embeddings, k)
+    return ids.tolist()
+
+def recall_at_k(found, expected):
+    """Share of the baseline top-k that a configuration also returns, averaged over queries"""
+    hits = [len(set(row) & set(truth)) / len(truth) for row, truth in zip(found, expected) if truth]
+    return sum(hits) / len(hits) if hits else 1.0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Recall@k and encode latency of embedding backends and storage formats')
+    parser.add_argument('--inputs', nargs='*', default=[], help='passage files, as accepted by scripts.knowledge_base')
+    parser.add_argument('--passages', type=int, default=5000, help='synthetic passages when no inputs are given')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--index', default=DEFAULT_INDEX)
+    parser.add_argument('--backends', nargs='+', default=list(SENTENCE_BACKENDS), choices=SENTENCE_BACKENDS)
+    parser.add_argument('--storage', nargs='+', default=list(EMBEDDING_STORAGE_FORMATS), choices=EMBEDDING_STORAGE_FORMATS)
+    args = parser.parse_args(argv)
+    
+    import faiss
+    
+    passages = list(dict.fromkeys(iter_passages(args.inputs))) if args.inputs else make_passages(args.passages)
+    queries = random.Random(1).sample(passages, min(args.queries, len(passages)))
+    
+    # Ground truth: exact search over fp32 embeddings from the eager model
+    baseline_model = model_registry.get_sentence_model('torch')
+    baseline = KnowledgeBase.build(passages, baseline_model, 'Flat')
+    expected = top_ids(baseline, baseline_model, queries, args.k)
+    
+    print(f"{len(passages)} passages, {len(queries)} queries, {args.index} index")
+    print(f"{'backend':10s} {'storage':8s} {'encode ms/text':>15s} {'index MB':>9s} {f'recall@{args.k}':>10s}")
+    for backend in args.backends:
+        sentence_model = model_registry.get_sentence_model(backend)
+        encode_texts(sentence_model, queries[:8])
+        
+        started = time.perf_counter()
+        encode_texts(sentence_model, queries)
+        encode_ms = (time.perf_counter() - started) / len(queries) * 1000
+        
+        for storage in args.storage:
+            knowledge_base = KnowledgeBase.build(passages, sentence_model, args.index, storage=storage)
+            index_mb = len(faiss.serialize_index(knowledge_base.index)) / 2 ** 20
+            recall = recall_at_k(top_ids(knowledge_base, sentence_model, queries, args.k), expected)
+            print(f"{backend:10s} {storage:8s} {encode_ms:15.2f} {index_mb:9.2f} {recall:10.3f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
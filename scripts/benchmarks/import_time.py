@@ -0,0 +1,77 @@
+# Usage: python -m scripts.benchmarks.import_time [modules...] [--check]
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tracked cumulative import budgets in milliseconds; keep these tight so
+# heavy dependencies cannot sneak back to module level unnoticed
+IMPORT_BUDGETS_MS = {
+    'scripts.pdf_tweet_extractor': 50,
+    'scripts.model_registry': 50,
+}
+
+def measure_import(module):
+    """Import a module in a fresh interpreter and parse -X importtime output"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    
+    timings = []
+    for line in completed.stderr.splitlines():
+        # Lines look like: "import time:       123 |        456 |   package.name"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings.append((name.strip(), int(self_us), int(cumulative_us)))
+    
+    cumulative = next((total for name, _, total in timings if name == module), None)
+    return cumulative, timings
+
+def benchmark(module, repeat=5, top=10):
+    """Return the best cumulative import time (ms) and the heaviest imports"""
+    best_us = None
+    best_timings = []
+    
+    for _ in range(repeat):
+        cumulative_us, timings = measure_import(module)
+        if cumulative_us is not None and (best_us is None or cumulative_us < best_us):
+            best_us = cumulative_us
+            best_timings = timings
+    
+    heaviest = sorted(best_timings, key=lambda item: item[1], reverse=True)[:top]
+    return best_us / 1000 if best_us is not None else None, heaviest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure import time of the scripts package')
+    parser.add_argument('modules', nargs='*', default=list(IMPORT_BUDGETS_MS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--check', action='store_true', help='exit non-zero when a module exceeds its budget')
+    args = parser.parse_args(argv)
+    
+    over_budget = []
+    for module in args.modules:
+        elapsed_ms, heaviest = benchmark(module, repeat=args.repeat, top=args.top)
+        budget_ms = IMPORT_BUDGETS_MS.get(module)
+        
+        print(f"{module}: {elapsed_ms:.1f} ms" + (f" (budget {budget_ms} ms)" if budget_ms else ""))
+        for name, self_us, cumulative_us in heaviest:
+            print(f"    {self_us / 1000:8.1f} ms self  {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+        
+        if budget_ms is not None and elapsed_ms > budget_ms:
+            over_budget.append(module)
+    
+    if args.check and over_budget:
+        print(f"Over budget: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
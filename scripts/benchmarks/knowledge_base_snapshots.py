@@ -0,0 +1,76 @@
+# Usage: python -m scripts.benchmarks.knowledge_base_snapshots [--layouts Flat IVF HNSW PQ] [--passages N] [--check]
+import argparse
+import sys
+import tempfile
+import time
+import zlib
+
+from scripts.knowledge_base import INDEX_FACTORIES, KnowledgeBase, normalized
+from scripts.retrieval import encode_texts
+
+class HashEncoder:
+    """Deterministic random vectors per text; the snapshot round trip doesn't depend on the model"""
+    
+    def __init__(self, dimension=64):
+        self.dimension = dimension
+    
+    def encode(self, texts, **kwargs):
+        import numpy as np
+        
+        return np.array([
+            np.random.RandomState(zlib.crc32(text.encode('utf-8'))).randn(self.dimension) for text in texts
+        ], dtype='float32')
+
+def snapshot_round_trip(layout, passages, encoder, root):
+    """Build, publish, load memory-mapped, then update a copy() and publish it as the next version"""
+    KnowledgeBase.build(passages, encoder, layout).save_snapshot(root)
+    
+    loaded = KnowledgeBase.load(root)
+    updated = loaded.copy()
+    added = updated.add(['a passage added to the copy'], encoder)
+    removed = updated.delete(passages[:10])
+    updated.save_snapshot(root)
+    
+    published = KnowledgeBase.load(root)
+    query = normalized(encode_texts(encoder, ['a passage added to the copy']))
+    problems = []
+    if loaded.ntotal != len(passages):
+        problems.append(f'mapped original changed to {loaded.ntotal} vectors')
+    if published.ntotal != len(passages) + len(added) - len(removed):
+        problems.append(f'published {published.ntotal} vectors')
+    if published.search(query, 1) != [['a passage added to the copy']]:
+        problems.append('added passage not found')
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check copy-and-publish of memory-mapped knowledge bases per index layout')
+    parser.add_argument('--layouts', nargs='+', default=list(INDEX_FACTORIES))
+    # Enough passages that IVF and PQ are trained instead of falling back to Flat
+    parser.add_argument('--passages', type=int, default=12000)
+    parser.add_argument('--check', action='store_true', help='exit non-zero when a layout fails the round trip')
+    args = parser.parse_args(argv)
+    
+    encoder = HashEncoder()
+    passages = [f'synthetic passage {i}' for i in range(args.passages)]
+    
+    failed = []
+    for layout in args.layouts:
+        started = time.perf_counter()
+        with tempfile.TemporaryDirectory() as root:
+            try:
+                problems = snapshot_round_trip(layout, passages, encoder, root)
+            except Exception as e:
+                problems = [str(e)]
+        
+        status = 'ok' if not problems else '; '.join(problems)
+        print(f"{layout:6s} {time.perf_counter() - started:6.1f} s  {status}")
+        if problems:
+            failed.append(layout)
+    
+    if args.check and failed:
+        print(f"Failed: {', '.join(failed)}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
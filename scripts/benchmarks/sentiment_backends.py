@@ -0,0 +1,56 @@
+# Usage: python -m scripts.benchmarks.sentiment_backends [--backends torch onnx_int8 torch_int8] [--texts N]
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from scripts import model_registry
+from scripts.sentiment_backends import PARITY_TEXTS, SENTIMENT_BACKENDS, parity_check
+from scripts.sentiment_engine import DEFAULT_BATCH_SIZE, SentimentEngine
+
+def make_texts(count, seed=0):
+    """Parity sentences stitched together so lengths vary like real rows"""
+    rng = random.Random(seed)
+    return [' '.join(rng.sample(PARITY_TEXTS, rng.randint(1, 4))) for _ in range(count)]
+
+def single_text_latency(sentiment_pipeline, texts, repeat):
+    latencies = []
+    for text in texts[:repeat]:
+        started = time.perf_counter()
+        sentiment_pipeline(text, truncation=True)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare latency, throughput and parity of sentiment backends')
+    parser.add_argument('--backends', nargs='+', default=list(SENTIMENT_BACKENDS), choices=SENTIMENT_BACKENDS)
+    parser.add_argument('--texts', type=int, default=512)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--latency-samples', type=int, default=50)
+    args = parser.parse_args(argv)
+    
+    texts = make_texts(args.texts)
+    reference = model_registry.get_sentiment_pipeline('torch')
+    
+    print(f"{'backend':12s} {'p50 ms':>8s} {'p95 ms':>8s} {'texts/s':>9s} {'agreement':>10s} {'max delta':>10s}")
+    for backend in args.backends:
+        sentiment_pipeline = model_registry.get_sentiment_pipeline(backend)
+        engine = SentimentEngine(sentiment_pipeline, batch_size=args.batch_size)
+        
+        # One warm-up pass so lazy initialization isn't timed
+        engine.predict(texts[:args.batch_size])
+        p50, p95 = single_text_latency(sentiment_pipeline, texts, args.latency_samples)
+        
+        started = time.perf_counter()
+        engine.predict(texts)
+        throughput = len(texts) / (time.perf_counter() - started)
+        
+        parity = parity_check(sentiment_pipeline, reference, texts)
+        print(f"{backend:12s} {p50 * 1000:8.1f} {p95 * 1000:8.1f} {throughput:9.1f} "
+              f"{parity['agreement']:10.1%} {parity['max_score_delta']:10.4f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
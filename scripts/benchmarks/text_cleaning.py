@@ -0,0 +1,99 @@
+# Usage: python -m scripts.benchmarks.text_cleaning [--lines N] [--repeat N]
+import argparse
+import random
+import re
+import sys
+import time
+
+from scripts.text_cleaning import DOCUMENT_PUNCTUATION, TWEET_LINE, TWEET_START, TextCleaner
+
+SAMPLE_WORDS = [
+    'love', 'this', 'product', 'terrible', 'service', '@brand', '#fail', 'https://t.co/x1',
+    'so', 'good!!', '(really)', 'meh...', '“quoted”', '—', 'ok', '$20', '\t', '  '
+]
+
+def legacy_clean(text):
+    """clean_tweet_text as it was before the shared cleaner: three passes, patterns looked up per call"""
+    if not text:
+        return ""
+    text = ' '.join(text.split())
+    text = re.sub(r'[^\w\s\.\!\?\,\;\:\'\"\-\@\#\$\%\&\*$$$$\+\=\[\]\{\}\|\\\<\>\/\~\`]', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+def legacy_parse(lines):
+    tweets = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        match = re.match(r'^\s*(\d+)\.\s*(.*)$', line)
+        if match:
+            tweets.append(match.group(2))
+    return tweets
+
+def compiled_parse(lines):
+    tweets = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        match = TWEET_START.match(line)
+        if match:
+            tweets.append(match.group(2))
+    return tweets
+
+def make_lines(count, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        words = ' '.join(rng.choice(SAMPLE_WORDS) for _ in range(rng.randint(5, 25)))
+        # Roughly one line in four continues the previous tweet
+        lines.append(words if i % 4 == 3 else f'{i + 1}. {words}')
+    return lines
+
+def best_of(repeat, func, *args):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare legacy and compiled tweet cleaning/parsing')
+    parser.add_argument('--lines', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+    
+    import pandas as pd
+    
+    lines = make_lines(args.lines)
+    text = '\n'.join(lines)
+    cleaner = TextCleaner(DOCUMENT_PUNCTUATION)
+    series = pd.Series(lines, dtype=object)
+    
+    cases = [
+        ('clean: legacy per line', lambda: [legacy_clean(line) for line in lines]),
+        ('clean: compiled per line', lambda: [cleaner.clean(line) for line in lines]),
+        ('clean: compiled Series', lambda: cleaner.clean_series(series).tolist()),
+        ('parse: legacy re.match', lambda: legacy_parse(text.split('\n'))),
+        ('parse: compiled match', lambda: compiled_parse(text.split('\n'))),
+        ('parse: multiline finditer', lambda: [m.group(2) for m in TWEET_LINE.finditer(text)]),
+    ]
+    
+    results = {}
+    for name, func in cases:
+        elapsed, results[name] = best_of(args.repeat, func)
+        print(f"{name:28s} {elapsed:8.3f} s  {elapsed / args.lines * 1e9:8.0f} ns/line")
+    
+    # The faster paths must produce exactly what the legacy code did
+    assert results['clean: compiled per line'] == results['clean: legacy per line']
+    assert results['clean: compiled Series'] == results['clean: legacy per line']
+    assert results['parse: compiled match'] == results['parse: legacy re.match']
+    assert [t.strip() for t in results['parse: multiline finditer']] == results['parse: legacy re.match']
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+# Usage: python -m scripts.benchmarks.tokenizer_concurrency [--rounds 20] [--mode gradient] [--check]
+import argparse
+import random
+import sys
+import threading
+import time
+
+from scripts import model_registry
+from scripts.attributions import ATTRIBUTION_MODES, DEFAULT_ATTRIBUTION_MODE
+from scripts.sentiment_backends import PARITY_TEXTS
+
+def make_texts(count, seed=0, long_every=4):
+    """Parity sentences, with every long_every-th text long enough to be split into windows"""
+    rng = random.Random(seed)
+    texts = []
+    for i in range(count):
+        sentences = rng.randint(60, 120) if i % long_every == 0 else rng.randint(1, 4)
+        texts.append(' '.join(rng.choice(PARITY_TEXTS) for _ in range(sentences)))
+    return texts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Score and attribute on separate threads, as the pipeline stages do, and count failed rows'
+    )
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--texts', type=int, default=64)
+    parser.add_argument('--mode', default=DEFAULT_ATTRIBUTION_MODE, choices=ATTRIBUTION_MODES)
+    parser.add_argument('--check', action='store_true', help='exit non-zero when any row failed')
+    args = parser.parse_args(argv)
+    
+    texts = make_texts(args.texts)
+    engine = model_registry.get_sentiment_engine(32)
+    attributor = model_registry.get_token_attributor(args.mode)
+    
+    failures = {'scored': 0, 'attributed': 0, 'errors': []}
+    
+    def score():
+        for _ in range(args.rounds):
+            failures['scored'] += sum(prediction is None for prediction in engine.score(texts))
+    
+    def attribute():
+        for _ in range(args.rounds):
+            failures['attributed'] += sum(result is None for result in attributor.attribute(texts))
+    
+    def run(target):
+        try:
+            target()
+        except Exception as e:
+            failures['errors'].append(f'{target.__name__}: {e}')
+    
+    started = time.perf_counter()
+    threads = [threading.Thread(target=run, args=(target,)) for target in (score, attribute)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    rows = args.rounds * len(texts)
+    print(f"{rows} rows scored and attributed concurrently in {time.perf_counter() - started:.1f} s")
+    print(f"failed scores: {failures['scored']}, failed attributions: {failures['attributed']}")
+    for error in failures['errors']:
+        print(f"error: {error}")
+    
+    if args.check and (failures['scored'] or failures['attributed'] or failures['errors']):
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,276 @@
+from collections.abc import Sequence
+
+class ColumnarResults(Sequence):
+    """Per-row sentiment results kept as arrays and read back as the usual dicts
+    
+    Sentiments are uint8 codes into `labels` and confidences float32. RAG context is
+    stored as knowledge base passage ids (-1 padded) and resolved through `passages`
+    only when a row is read. Texts are the caller's list, referenced by row index.
+    Indexing or iterating yields {'text', 'sentiment', 'confidence'[, 'context']}
+    dicts, and slicing returns another view, so callers that expect lists of dicts
+    keep working.
+    """
+    
+    def __init__(self, texts, labels, codes, confidences, context_ids=None, has_context=None, passages=None):
+        self.texts = texts
+        self.labels = labels
+        self.codes = codes
+        self.confidences = confidences
+        self.context_ids = context_ids
+        self.has_context = has_context
+        self.passages = passages
+    
+    @classmethod
+    def build(cls, texts, sentiments, confidences, contexts=None, passages=None):
+        """Pack per-row labels, confidences and passage id lists (None for rows without a 'context' key)"""
+        import numpy as np
+        
+        labels = list(dict.fromkeys(sentiments))
+        if len(labels) > 256:
+            raise ValueError(f"Too many distinct labels for uint8 codes: {len(labels)}")
+        code_of = {label: code for code, label in enumerate(labels)}
+        
+        context_ids = has_context = None
+        if contexts is not None:
+            width = max((len(ids) for ids in contexts if ids), default=0)
+            context_ids = np.full((len(contexts), width), -1, dtype=np.int64)
+            for row, ids in enumerate(contexts):
+                if ids:
+                    context_ids[row, :len(ids)] = ids
+            has_context = np.fromiter((ids is not None for ids in contexts), dtype=bool, count=len(contexts))
+        
+        return cls(
+            list(texts),
+            tuple(labels),
+            np.fromiter((code_of[label] for label in sentiments), dtype=np.uint8, count=len(sentiments)),
+            np.asarray(confidences, dtype=np.float32),
+            context_ids,
+            has_context,
+            passages
+        )
+    
+    @classmethod
+    def concat(cls, parts):
+        """One result set from consecutive parts, remapping label codes to a shared table"""
+        import numpy as np
+        
+        labels = tuple(dict.fromkeys(label for part in parts for label in part.labels))
+        code_of = {label: code for code, label in enumerate(labels)}
+        codes = [
+            np.asarray([code_of[label] for label in part.labels], dtype=np.uint8)[part.codes]
+            if part.labels else part.codes
+            for part in parts
+        ]
+        
+        context_ids = has_context = None
+        if parts and all(part.context_ids is not None for part in parts):
+            width = max(part.context_ids.shape[1] for part in parts)
+            context_ids = np.vstack([
+                np.pad(part.context_ids, ((0, 0), (0, width - part.context_ids.shape[1])), constant_values=-1)
+                for part in parts
+            ])
+            has_context = np.concatenate([part.has_context for part in parts])
+        
+        return cls(
+            [text for part in parts for text in part.texts],
+            labels,
+            np.concatenate(codes) if codes else np.zeros(0, dtype=np.uint8),
+            np.concatenate([part.confidences for part in parts]) if parts else np.zeros(0, dtype=np.float32),
+            context_ids,
+            has_context,
+            next((part.passages for part in parts if part.passages is not None), None)
+        )
+    
+    def __len__(self):
+        return len(self.codes)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ColumnarResults(
+                self.texts[index], self.labels, self.codes[index], self.confidences[index],
+                None if self.context_ids is None else self.context_ids[index],
+                None if self.has_context is None else self.has_context[index],
+                self.passages
+            )
+        
+        result = {
+            'text': self.texts[index],
+            'sentiment': self.labels[self.codes[index]],
+            # float32 keeps about 7 significant digits; rounding hides the binary noise (0.9 not 0.899999976)
+            'confidence': round(float(self.confidences[index]), 6)
+        }
+        if self.has_context is not None and self.has_context[index]:
+            result['context'] = self.context(index)
+        return result
+    
+    def __eq__(self, other):
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(mine == theirs for mine, theirs in zip(self, other))
+    
+    def __getstate__(self):
+        # Workers hand results back without the knowledge base; the receiver re-attaches its own
+        return {**self.__dict__, 'passages': None}
+    
+    def context(self, index):
+        """Passages retrieved for one row"""
+        passages = self.passages
+        found = (passages.get(i) for i in self.context_ids[index].tolist() if i >= 0)
+        return [passage for passage in found if passage is not None]
+    
+    def sentiments(self):
+        """Sentiment label of every row, without building the row dicts"""
+        return [self.labels[code] for code in self.codes.tolist()]
+    
+    def to_dicts(self):
+        """The results as the plain list of dicts the API returns"""
+        return list(self)
+
+class ColumnarExplanations(Sequence):
+    """Per-row explanations kept as arrays and read back as the usual dicts
+    
+    The explanation sentence is a uint32 code into `messages`, since few distinct
+    sentences repeat across rows. Lexicon highlights are (start, end) character
+    offsets into the row's text with a uint8 category code; row i owns hits
+    hit_first[i]:hit_last[i]. Rows without text have no highlights, and token
+    attributions are kept only for the rows that have them, keyed by row index.
+    Indexing or iterating yields {'text', 'explanation'[, 'highlights'][, 'attributions']}
+    dicts, and slicing returns another view.
+    """
+    
+    def __init__(self, texts, messages, codes, has_text, hit_first, hit_last, spans, hit_categories, categories,
+                 attributions=None):
+        self.texts = texts
+        self.messages = messages
+        self.codes = codes
+        self.has_text = has_text
+        self.hit_first = hit_first
+        self.hit_last = hit_last
+        self.spans = spans
+        self.hit_categories = hit_categories
+        self.categories = categories
+        self.attributions = attributions if attributions is not None else {}
+    
+    @classmethod
+    def build(cls, texts, messages, hits):
+        """Pack per-row explanation sentences and lexicon hits (None for rows without text)"""
+        import numpy as np
+        
+        message_table = list(dict.fromkeys(messages))
+        message_of = {message: code for code, message in enumerate(message_table)}
+        
+        categories = list(dict.fromkeys(hit['category'] for row_hits in hits if row_hits for hit in row_hits))
+        if len(categories) > 256:
+            raise ValueError(f"Too many lexicon categories for uint8 codes: {len(categories)}")
+        category_of = {category: code for code, category in enumerate(categories)}
+        
+        counts = np.fromiter((len(row_hits) if row_hits else 0 for row_hits in hits), dtype=np.int64, count=len(hits))
+        hit_last = np.cumsum(counts)
+        flat = [hit for row_hits in hits if row_hits for hit in row_hits]
+        
+        return cls(
+            list(texts),
+            tuple(message_table),
+            np.fromiter((message_of[message] for message in messages), dtype=np.uint32, count=len(messages)),
+            np.fromiter((row_hits is not None for row_hits in hits), dtype=bool, count=len(hits)),
+            hit_last - counts,
+            hit_last,
+            np.array([(hit['start'], hit['end']) for hit in flat], dtype=np.int32).reshape(-1, 2),
+            np.fromiter((category_of[hit['category']] for hit in flat), dtype=np.uint8, count=len(flat)),
+            tuple(categories)
+        )
+    
+    @classmethod
+    def concat(cls, parts):
+        """One explanation set from consecutive parts, remapping codes to shared tables"""
+        import numpy as np
+        
+        messages = tuple(dict.fromkeys(message for part in parts for message in part.messages))
+        categories = tuple(dict.fromkeys(category for part in parts for category in part.categories))
+        message_of = {message: code for code, message in enumerate(messages)}
+        category_of = {category: code for code, category in enumerate(categories)}
+        
+        codes, hit_first, hit_last, spans, hit_categories = [], [], [], [], []
+        attributions = {}
+        rows = hits = 0
+        for part in parts:
+            if part.messages:
+                codes.append(np.asarray([message_of[m] for m in part.messages], dtype=np.uint32)[part.codes])
+            if part.categories:
+                hit_categories.append(
+                    np.asarray([category_of[c] for c in part.categories], dtype=np.uint8)[part.hit_categories]
+                )
+            hit_first.append(part.hit_first + hits)
+            hit_last.append(part.hit_last + hits)
+            spans.append(part.spans)
+            for row, attribution in part.attributions.items():
+                attributions[rows + row] = attribution
+            rows += len(part)
+            hits += len(part.spans)
+        
+        return cls(
+            [text for part in parts for text in part.texts],
+            messages,
+            np.concatenate(codes) if codes else np.zeros(0, dtype=np.uint32),
+            np.concatenate([part.has_text for part in parts]) if parts else np.zeros(0, dtype=bool),
+            np.concatenate(hit_first) if parts else np.zeros(0, dtype=np.int64),
+            np.concatenate(hit_last) if parts else np.zeros(0, dtype=np.int64),
+            np.vstack(spans) if parts else np.zeros((0, 2), dtype=np.int32),
+            np.concatenate(hit_categories) if hit_categories else np.zeros(0, dtype=np.uint8),
+            categories,
+            attributions
+        )
+    
+    def __len__(self):
+        return len(self.codes)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            rows = range(len(self))[index]
+            return ColumnarExplanations(
+                self.texts[index], self.messages, self.codes[index], self.has_text[index],
+                self.hit_first[index], self.hit_last[index], self.spans, self.hit_categories, self.categories,
+                {rows.index(row): attribution for row, attribution in self.attributions.items() if row in rows}
+            )
+        
+        if index < 0:
+            index += len(self)
+        text = self.texts[index]
+        result = {'text': text, 'explanation': self.messages[self.codes[index]]}
+        if self.has_text[index]:
+            result['highlights'] = self.highlights(index)
+        if index in self.attributions:
+            result['attributions'] = self.attributions[index]
+        return result
+    
+    def __eq__(self, other):
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(mine == theirs for mine, theirs in zip(self, other))
+    
+    def highlights(self, index):
+        """Lexicon hits of one row as {'term', 'category', 'start', 'end'} dicts"""
+        text = self.texts[index]
+        first, last = int(self.hit_first[index]), int(self.hit_last[index])
+        return [
+            {'term': text[start:end].lower(), 'category': self.categories[category], 'start': start, 'end': end}
+            for (start, end), category in zip(self.spans[first:last].tolist(), self.hit_categories[first:last].tolist())
+        ]
+    
+    def to_dicts(self):
+        """The explanations as the plain list of dicts the API returns"""
+        return list(self)
+
+def concat_rows(parts):
+    """Concatenate chunks of per-row results, staying columnar when every chunk is"""
+    if parts and all(isinstance(part, ColumnarResults) for part in parts):
+        return ColumnarResults.concat(parts)
+    if parts and all(isinstance(part, ColumnarExplanations) for part in parts):
+        return ColumnarExplanations.concat(parts)
+    return [row for part in parts for row in part]
+
+def sentiment_labels(results):
+    """Sentiment of every row of a result list or ColumnarResults"""
+    if isinstance(results, ColumnarResults):
+        return results.sentiments()
+    return [result['sentiment'] for result in results]
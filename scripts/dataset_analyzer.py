@@ -1,45 +1,14 @@
 import pandas as pd
-import numpy as np
-import json
-from transformers import pipeline
-from docx import Document
-import faiss
-from sentence_transformers import SentenceTransformer
-import shap
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-import seaborn as sns
-from collections import Counter
-import re
 
-class DatasetAnalyzer:
-    def __init__(self):
-        # Initialize sentiment analysis pipeline
-        self.sentiment_pipeline = pipeline("sentiment-analysis", 
-                                         model="cardiffnlp/twitter-roberta-base-sentiment-latest")
-        
-        # Initialize sentence transformer for RAG
-        self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
-        
-        # Initialize knowledge base (mock hate lexicons and domain documents)
-        self.knowledge_base = [
-            "Hate speech often contains derogatory terms targeting specific groups",
-            "Positive sentiment indicators include words like excellent, amazing, love, great",
-            "Negative sentiment indicators include words like terrible, awful, hate, disappointed",
-            "Neutral sentiment often uses factual language without emotional indicators",
-            "Context matters significantly in sentiment analysis",
-            "Sarcasm can flip the apparent sentiment of a statement"
-        ]
-        
-        # Create FAISS index for knowledge base
-        self.setup_knowledge_base()
-    
-    def setup_knowledge_base(self):
-        """Setup FAISS index for RAG retrieval"""
-        embeddings = self.sentence_model.encode(self.knowledge_base)
-        self.index = faiss.IndexFlatIP(embeddings.shape[1])
-        self.index.add(embeddings.astype('float32'))
-    
+from .analyzer_base import AnalyzerBase
+from .ingest import DEFAULT_CHUNK_SIZE, frame_records, iter_file_chunks
+from .pipeline import (
+    ANALYSIS_MODES, analyze_column_chunks, empty_column, frame_to_column_chunk, rows_to_column_chunk
+)
+from .result_cache import track_stats
+from .sampling import DEFAULT_SAMPLE_SIZE, sample_rows
+
+class DatasetAnalyzer(AnalyzerBase):
     def parse_file(self, file_path):
         """Parse different file formats"""
         file_extension = file_path.split('.')[-1].lower()
@@ -51,6 +20,8 @@ class DatasetAnalyzer:
         elif file_extension == 'json':
             df = pd.read_json(file_path)
         elif file_extension == 'docx':
+            from docx import Document
+            
             doc = Document(file_path)
             texts = [paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip()]
             df = pd.DataFrame({'text': texts})
@@ -75,215 +46,128 @@ class DatasetAnalyzer:
         
         return text_columns
     
-    def baseline_sentiment_analysis(self, texts):
-        """Run baseline sentiment analysis"""
-        results = []
-        
-        for text in texts:
-            if pd.isna(text) or text.strip() == '':
-                results.append({
-                    'text': text,
-                    'sentiment': 'NEUTRAL',
-                    'confidence': 0.5
-                })
-                continue
+    def iter_text_chunks(self, file_path, chunk_size, stats, text_columns=None, stratify_by=None):
+        """Yield (rows, strata) for the analyzed text columns chunk by chunk, filling in stats"""
+        chunks = self.iter_frames(file_path, chunk_size, stats)
+        
+        first_chunk = True
+        for chunk in chunks:
+            # Columns, preview and text columns come from the first chunk
+            if first_chunk:
+                first_chunk = False
+                stats['columns'] = len(chunk.columns)
+                stats['preview'] = frame_records(chunk.head())
+                stats['text_columns'] = self.select_text_columns(chunk, text_columns)
+                print(f"[v0] Analyzing text columns: {stats['text_columns']}")
             
-            try:
-                result = self.sentiment_pipeline(text)[0]
-                results.append({
-                    'text': text,
-                    'sentiment': result['label'],
-                    'confidence': result['score']
-                })
-            except Exception as e:
-                print(f"Error processing text: {text[:50]}... Error: {e}")
-                results.append({
-                    'text': text,
-                    'sentiment': 'NEUTRAL',
-                    'confidence': 0.5
-                })
-        
-        return results
-    
-    def rag_sentiment_analysis(self, texts):
-        """Run RAG-enhanced sentiment analysis"""
-        results = []
-        
-        for text in texts:
-            if pd.isna(text) or text.strip() == '':
-                results.append({
-                    'text': text,
-                    'sentiment': 'NEUTRAL',
-                    'confidence': 0.5
-                })
-                continue
+            stats['rows'] += len(chunk)
+            stats['missing_values'] += int(chunk.isnull().sum().sum())
             
-            try:
-                # Get baseline prediction
-                baseline = self.sentiment_pipeline(text)[0]
-                
-                # Retrieve relevant context from knowledge base
-                text_embedding = self.sentence_model.encode([text])
-                _, indices = self.index.search(text_embedding.astype('float32'), k=2)
-                
-                relevant_context = [self.knowledge_base[i] for i in indices[0]]
-                
-                # Enhanced prediction with context (simplified)
-                # In practice, this would involve more sophisticated RAG techniques
-                enhanced_confidence = min(baseline['score'] + 0.05, 1.0)
-                
-                results.append({
-                    'text': text,
-                    'sentiment': baseline['label'],
-                    'confidence': enhanced_confidence,
-                    'context': relevant_context
-                })
-            except Exception as e:
-                print(f"Error processing text: {text[:50]}... Error: {e}")
-                results.append({
-                    'text': text,
-                    'sentiment': 'NEUTRAL',
-                    'confidence': 0.5,
-                    'context': []
-                })
-        
-        return results
-    
-    def generate_explanations(self, texts, sentiments):
-        """Generate explanations for sentiment predictions"""
-        explanations = []
-        
-        # Simple keyword-based explanations (in practice, use SHAP/LIME)
-        positive_keywords = ['love', 'amazing', 'excellent', 'great', 'wonderful', 'fantastic']
-        negative_keywords = ['hate', 'terrible', 'awful', 'bad', 'horrible', 'disappointed']
-        
-        for text, sentiment_data in zip(texts, sentiments):
-            if pd.isna(text):
-                explanations.append({
-                    'text': text,
-                    'explanation': 'No text to analyze'
-                })
+            if not stats['text_columns']:
                 continue
             
-            text_lower = text.lower()
-            found_positive = [kw for kw in positive_keywords if kw in text_lower]
-            found_negative = [kw for kw in negative_keywords if kw in text_lower]
+            # Missing values become None so every column can be filtered the same way
+            rows = chunk[stats['text_columns']].astype(object)
+            rows = rows.where(rows.notna(), None)
             
-            if found_positive and sentiment_data['sentiment'] == 'POSITIVE':
-                explanation = f"Keywords '{', '.join(found_positive)}' indicate positive sentiment"
-            elif found_negative and sentiment_data['sentiment'] == 'NEGATIVE':
-                explanation = f"Keywords '{', '.join(found_negative)}' indicate negative sentiment"
-            elif sentiment_data['sentiment'] == 'NEUTRAL':
-                explanation = "Neutral language with no strong emotional indicators"
-            else:
-                explanation = f"Overall tone and context suggest {sentiment_data['sentiment'].lower()} sentiment"
+            strata = None
+            if stratify_by is not None:
+                strata = chunk[stratify_by].astype(object).where(chunk[stratify_by].notna(), None).tolist()
             
-            explanations.append({
-                'text': text,
-                'explanation': explanation
-            })
-        
-        return explanations
+            yield rows, strata
     
-    def create_word_clouds(self, texts, sentiments):
-        """Create word clouds for different sentiment categories"""
-        sentiment_texts = {'POSITIVE': [], 'NEGATIVE': [], 'NEUTRAL': []}
-        
-        for text, sentiment_data in zip(texts, sentiments):
-            if pd.notna(text) and text.strip():
-                sentiment_texts[sentiment_data['sentiment']].append(text)
-        
-        word_clouds = {}
-        for sentiment, text_list in sentiment_texts.items():
-            if text_list:
-                combined_text = ' '.join(text_list)
-                # Simple word frequency (in practice, use proper NLP preprocessing)
-                words = re.findall(r'\b\w+\b', combined_text.lower())
-                word_freq = Counter(words)
-                
-                # Remove common stop words
-                stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them'}
-                filtered_freq = {word: freq for word, freq in word_freq.items() 
-                               if word not in stop_words and len(word) > 2}
-                
-                # Get top words
-                top_words = sorted(filtered_freq.items(), key=lambda x: x[1], reverse=True)[:20]
-                word_clouds[sentiment.lower()] = [{'text': word, 'value': freq} for word, freq in top_words]
-            else:
-                word_clouds[sentiment.lower()] = []
-        
-        return word_clouds
+    def select_text_columns(self, df, text_columns=None):
+        """Use the requested text columns, or every detected one"""
+        if text_columns is None:
+            return self.detect_text_columns(df)
+        
+        missing = [col for col in text_columns if col not in df.columns]
+        if missing:
+            raise ValueError(f"Unknown text columns: {missing}")
+        return list(text_columns)
     
-    def analyze_dataset(self, file_path):
+    def iter_frames(self, file_path, chunk_size, stats):
+        """DataFrame chunks of the whole file; subclasses may add format-specific stats"""
+        return self.parse_file_chunks(file_path, chunk_size)
+    
+    def parse_file_chunks(self, file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Stream a dataset file as DataFrames of at most chunk_size rows"""
+        return iter_file_chunks(file_path, chunk_size)
+    
+    def analyze_dataset(self, file_path, mode='full', text_columns=None, sample_size=DEFAULT_SAMPLE_SIZE,
+                        stratify_by=None, chunk_size=DEFAULT_CHUNK_SIZE, keep_results=True, on_chunk=None,
+                        progress_callback=None):
         """Main analysis function"""
-        print(f"[v0] Starting analysis of {file_path}")
+        if mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unsupported analysis mode: {mode}")
+        
+        print(f"[v0] Starting {mode} analysis of {file_path}")
         
-        # Parse file
-        df = self.parse_file(file_path)
-        print(f"[v0] Parsed dataset: {len(df)} rows, {len(df.columns)} columns")
+        # One attribution budget for the whole file rather than one per chunk
+        deadline = self.attribution_deadline()
         
-        # Basic statistics
+        # Basic statistics, filled in while the file streams through the pipeline
         stats = {
-            'rows': len(df),
-            'columns': len(df.columns),
-            'missing_values': df.isnull().sum().sum(),
-            'preview': df.head().to_dict('records')
+            'rows': 0,
+            'columns': 0,
+            'missing_values': 0,
+            'preview': [],
+            'text_columns': []
         }
+        chunks = self.iter_text_chunks(file_path, chunk_size, stats, text_columns, stratify_by)
+        
+        if mode == 'sample':
+            # Quick preview: one pass to draw the sample, then score only the sampled rows
+            sample = sample_rows(
+                ((list(rows.itertuples(index=False, name=None)), strata) for rows, strata in chunks),
+                sample_size
+            )
+            print(f"[v0] Sampled {len(sample)} of {stats['rows']} rows")
+            column_chunks = (
+                rows_to_column_chunk(stats['text_columns'], sample[start:start + chunk_size])
+                for start in range(0, len(sample), chunk_size)
+            )
+        else:
+            column_chunks = (frame_to_column_chunk(rows) for rows, _ in chunks)
         
-        # Detect text columns
-        text_columns = self.detect_text_columns(df)
-        print(f"[v0] Detected text columns: {text_columns}")
-        
-        if not text_columns:
-            return {**stats, 'text_columns': [], 'message': 'No text columns detected'}
-        
-        # Analyze first text column
-        text_col = text_columns[0]
-        texts = df[text_col].dropna().head(100).tolist()  # Limit for demo
-        
-        print("[v0] Running baseline sentiment analysis...")
-        baseline_results = self.baseline_sentiment_analysis(texts)
-        
-        print("[v0] Running RAG-enhanced sentiment analysis...")
-        rag_results = self.rag_sentiment_analysis(texts)
-        
-        print("[v0] Generating explanations...")
-        explanations = self.generate_explanations(texts, rag_results)
+        # Read chunk -> infer batch -> aggregate, with the stages overlapping
+        with track_stats() as cache_stats:
+            analysis = analyze_column_chunks(
+                self, column_chunks, keep_results=keep_results, on_chunk=on_chunk, progress_callback=progress_callback,
+                attribution_deadline=deadline
+            )
         
-        print("[v0] Creating word clouds...")
-        word_clouds = self.create_word_clouds(texts, rag_results)
+        if not stats['text_columns']:
+            return {**stats, 'message': 'No text columns detected'}
         
-        # Calculate sentiment distributions
-        baseline_dist = Counter([r['sentiment'] for r in baseline_results])
-        rag_dist = Counter([r['sentiment'] for r in rag_results])
+        print("[v0] Analysis complete!")
         
-        total = len(baseline_results)
-        sentiment_distribution = {
-            'baseline': {
-                'positive': round(baseline_dist.get('POSITIVE', 0) / total * 100, 1),
-                'negative': round(baseline_dist.get('NEGATIVE', 0) / total * 100, 1),
-                'neutral': round(baseline_dist.get('NEUTRAL', 0) / total * 100, 1)
-            },
-            'rag': {
-                'positive': round(rag_dist.get('POSITIVE', 0) / total * 100, 1),
-                'negative': round(rag_dist.get('NEGATIVE', 0) / total * 100, 1),
-                'neutral': round(rag_dist.get('NEUTRAL', 0) / total * 100, 1)
-            }
+        # Results are keyed per column; the first column is also kept at the top level
+        columns = {
+            column: analysis['columns'].get(column) or empty_column(keep_results)
+            for column in stats['text_columns']
         }
         
-        print("[v0] Analysis complete!")
-        
-        return {
+        results = {
             **stats,
-            'text_columns': text_columns,
-            'baseline_sentiment': baseline_results,
-            'rag_sentiment': rag_results,
-            'explanations': explanations,
-            'sentiment_distribution': sentiment_distribution,
-            'word_clouds': word_clouds
+            'mode': mode,
+            **columns[stats['text_columns'][0]],
+            'columns': columns,
+            'throughput': analysis['throughput'],
+            'dedup': analysis['dedup']
         }
+        
+        # Report cache hits and misses for this run only
+        if self.result_cache is not None:
+            results['cache'] = cache_stats
+        
+        return results
+    
+    def analyze_dataset_streaming(self, file_path, chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None):
+        """Analyze a dataset chunk by chunk, keeping only aggregates in memory"""
+        return self.analyze_dataset(file_path, chunk_size=chunk_size, keep_results=False, on_chunk=on_chunk)
 
-# Example usage
+# Example usage (run from the repository root: python -m scripts.dataset_analyzer)
 if __name__ == "__main__":
     analyzer = DatasetAnalyzer()
     
@@ -0,0 +1,252 @@
+import re
+import zlib
+
+from .result_cache import normalize_text
+from .retrieval import embed_batch
+from .sentiment_engine import is_blank
+
+NEAR_DUPLICATE_MODES = (None, 'minhash', 'embedding')
+
+DEFAULT_MINHASH_THRESHOLD = 0.8
+DEFAULT_EMBEDDING_THRESHOLD = 0.95
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+
+# Largest Mersenne prime whose products with 32-bit hashes still fit in uint64
+MINHASH_PRIME = (1 << 31) - 1
+
+RETWEET_PREFIX = re.compile(r'^rt @\w+:?\s*')
+WORD_PATTERN = re.compile(r'\w+')
+
+def normalize_for_dedup(text):
+    """Case-fold, collapse whitespace and drop a leading 'RT @user:' so retweets match their source
+    
+    Only for the opt-in near-duplicate modes; the model is case-sensitive, so exact groups
+    only ignore whitespace, like the result cache.
+    """
+    text = ' '.join(text.casefold().split())
+    return RETWEET_PREFIX.sub('', text)
+
+def shingles(text, size=2):
+    """Word n-gram shingles used for MinHash similarity"""
+    words = WORD_PATTERN.findall(text)
+    if len(words) < size:
+        return set(words)
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def dedup_report(texts, unique):
+    """Texts seen, groups scored and the share of model calls saved"""
+    return {
+        'texts': texts,
+        'unique': unique,
+        'ratio': round(1 - unique / texts, 4) if texts else 0.0
+    }
+
+class DedupGroups:
+    """Assignment of every text to a duplicate group with one representative each"""
+    
+    def __init__(self, assignment, representatives, embeddings=None):
+        self.assignment = assignment
+        self.representatives = representatives
+        # Embedding mode only: the dedup pass's vector per representative (None where encoding failed)
+        self.embeddings = embeddings
+    
+    def expand(self, values):
+        """Fan one value per group back out to every member text"""
+        return [values[group] for group in self.assignment]
+    
+    def report(self):
+        return dedup_report(len(self.assignment), len(self.representatives))
+
+class DedupCounter:
+    """Running dedup totals across the chunks of one run"""
+    
+    def __init__(self):
+        self.texts = 0
+        self.unique = 0
+    
+    def add(self, groups):
+        self.texts += len(groups.assignment)
+        self.unique += len(groups.representatives)
+    
+    def report(self):
+        return dedup_report(self.texts, self.unique)
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+    
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+    
+    def union(self, i, j):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            # Keep the earliest text as the root so it becomes the representative
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+class TextDeduplicator:
+    """Exact dedup on normalized text with optional MinHash/LSH or embedding near-duplicate grouping"""
+    
+    def __init__(self, near_duplicates=None, threshold=None, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS):
+        if near_duplicates not in NEAR_DUPLICATE_MODES:
+            raise ValueError(f"Unsupported near-duplicate mode: {near_duplicates}")
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        
+        self.near_duplicates = near_duplicates
+        if threshold is None:
+            threshold = DEFAULT_EMBEDDING_THRESHOLD if near_duplicates == 'embedding' else DEFAULT_MINHASH_THRESHOLD
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self._minhash_params = None
+    
+    def group(self, texts, embed=None):
+        """Group texts; embed(texts) -> (matrix, rows) is needed for the embedding mode"""
+        texts = list(texts)
+        
+        # Exact pass: one candidate per whitespace-normalized string, blanks share a single group
+        first_by_key = {}
+        candidates = []
+        candidate_of = []
+        for i, text in enumerate(texts):
+            key = None if is_blank(text) else normalize_text(text)
+            if key not in first_by_key:
+                first_by_key[key] = len(candidates)
+                candidates.append(i)
+            candidate_of.append(first_by_key[key])
+        
+        # Near-duplicate pass over the distinct non-blank candidates
+        groups = UnionFind(len(candidates))
+        eligible = [c for c, i in enumerate(candidates) if not is_blank(texts[i])]
+        vectors = None
+        if self.near_duplicates == 'minhash':
+            self.merge_minhash(groups, eligible, [normalize_for_dedup(texts[candidates[c]]) for c in eligible])
+        elif self.near_duplicates == 'embedding':
+            if embed is None:
+                raise ValueError("Embedding near-duplicate mode needs an embed function")
+            vectors = self.merge_embeddings(groups, eligible, [texts[candidates[c]] for c in eligible], embed)
+        
+        # Compact group ids in first-seen order, with the first member as representative
+        group_ids = {}
+        representatives = []
+        assignment = []
+        for i, candidate in enumerate(candidate_of):
+            root = groups.find(candidate)
+            if root not in group_ids:
+                group_ids[root] = len(representatives)
+                representatives.append(i)
+            assignment.append(group_ids[root])
+        
+        embeddings = None
+        if vectors is not None:
+            # Each representative is its group's root candidate, so the dedup pass already embedded it
+            vector_of = dict(zip((candidates[c] for c in eligible), vectors))
+            embeddings = [vector_of.get(i) for i in representatives]
+        
+        return DedupGroups(assignment, representatives, embeddings)
+    
+    def minhash_signatures(self, normalized_texts):
+        import numpy as np
+        
+        if self._minhash_params is None:
+            rng = np.random.RandomState(1)
+            self._minhash_params = (
+                rng.randint(1, MINHASH_PRIME, self.num_perm).astype(np.uint64),
+                rng.randint(0, MINHASH_PRIME, self.num_perm).astype(np.uint64)
+            )
+        a, b = self._minhash_params
+        
+        signatures = np.full((len(normalized_texts), self.num_perm), MINHASH_PRIME, dtype=np.uint64)
+        for row, text in enumerate(normalized_texts):
+            hashes = np.fromiter(
+                (zlib.crc32(shingle.encode('utf-8')) % MINHASH_PRIME for shingle in shingles(text)),
+                dtype=np.uint64
+            )
+            if len(hashes):
+                signatures[row] = ((np.outer(hashes, a) + b) % MINHASH_PRIME).min(axis=0)
+        return signatures
+    
+    def merge_minhash(self, groups, candidates, normalized_texts):
+        """Union candidates whose MinHash signatures collide in an LSH band and agree above threshold"""
+        signatures = self.minhash_signatures(normalized_texts)
+        rows_per_band = self.num_perm // self.bands
+        buckets = {}
+        
+        for position, signature in enumerate(signatures):
+            # Emoji- or punctuation-only texts have no shingles and an all-MINHASH_PRIME signature
+            # that would match every other such text; they keep only their exact-match group
+            if signature[0] == MINHASH_PRIME:
+                continue
+            
+            for band in range(self.bands):
+                band_key = (band, signature[band * rows_per_band:(band + 1) * rows_per_band].tobytes())
+                other = buckets.setdefault(band_key, position)
+                if other == position:
+                    continue
+                
+                # LSH only proposes pairs; confirm with the estimated Jaccard similarity
+                if (signature == signatures[other]).mean() >= self.threshold:
+                    groups.union(candidates[position], candidates[other])
+    
+    def merge_embeddings(self, groups, candidates, texts, embed):
+        """Greedily attach each text to the first representative within cosine threshold
+        
+        Returns the embedding of every text (None where encoding failed) for reuse in retrieval.
+        """
+        import numpy as np
+        
+        vectors = [None] * len(texts)
+        matrix, rows = embed(texts)
+        if not rows:
+            return vectors
+        for position, vector in zip(rows, matrix):
+            vectors[position] = vector
+        
+        matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        representatives = np.empty_like(matrix)
+        representative_rows = []
+        
+        for position, vector in zip(rows, matrix):
+            if representative_rows:
+                similarities = representatives[:len(representative_rows)] @ vector
+                best = int(similarities.argmax())
+                if similarities[best] >= self.threshold:
+                    groups.union(candidates[representative_rows[best]], candidates[position])
+                    continue
+            
+            representatives[len(representative_rows)] = vector
+            representative_rows.append(position)
+        
+        return vectors
+
+def score_groups(analyzer, texts):
+    """Score one representative per duplicate group and fan predictions and context back out"""
+    texts = list(texts)
+    
+    def embed(batch):
+        return embed_batch(
+            analyzer.sentence_model, batch, cache=analyzer.result_cache,
+            backend=analyzer.sentence_backend, storage=analyzer.embedding_storage
+        )
+    
+    groups = analyzer.deduplicator.group(texts, embed=embed)
+    representatives = [texts[i] for i in groups.representatives]
+    
+    predictions = analyzer.score_texts(representatives)
+    
+    # Retrieval only runs for representatives the model could score
+    scored = [group for group, prediction in enumerate(predictions) if prediction is not None]
+    contexts = [None] * len(representatives)
+    # Embedding-mode dedup already encoded the representatives; search with those vectors
+    embeddings = None if groups.embeddings is None else [groups.embeddings[g] for g in scored]
+    for group, context in zip(scored, analyzer.retrieve_context_ids([representatives[g] for g in scored], embeddings)):
+        contexts[group] = context
+    
+    # Only needed until retrieval; don't ship the vectors back from worker processes
+    groups.embeddings = None
+    return groups.expand(predictions), groups.expand(contexts), groups
@@ -0,0 +1,80 @@
+import os
+
+from .sentiment_backends import DEFAULT_ARTIFACT_DIR, cpu_quantization_target
+
+# 'torch' is the eager fp32 sentence transformer, 'onnx' runs the same weights on ONNX Runtime
+# and 'onnx_int8' uses a dynamically int8-quantized ONNX export
+SENTENCE_BACKENDS = ('torch', 'onnx', 'onnx_int8')
+DEFAULT_SENTENCE_BACKEND = 'torch'
+
+# Precision embeddings are kept in, both in the FAISS index and in the result cache
+EMBEDDING_STORAGE_FORMATS = ('float32', 'float16', 'int8')
+DEFAULT_EMBEDDING_STORAGE = 'float32'
+
+def check_sentence_backend(backend):
+    if backend not in SENTENCE_BACKENDS:
+        raise ValueError(f"Unsupported sentence backend: {backend}")
+    return backend
+
+def check_storage(storage):
+    if storage not in EMBEDDING_STORAGE_FORMATS:
+        raise ValueError(f"Unsupported embedding storage: {storage}")
+    return storage
+
+def load_sentence_model(model_name, backend=DEFAULT_SENTENCE_BACKEND, root=DEFAULT_ARTIFACT_DIR):
+    """SentenceTransformer on the requested backend
+    
+    The hub repo of all-MiniLM-L6-v2 already ships int8 ONNX files per instruction
+    set; other models are quantized once into the artifact cache.
+    """
+    from sentence_transformers import SentenceTransformer
+    
+    if check_sentence_backend(backend) == 'torch':
+        return SentenceTransformer(model_name)
+    if backend == 'onnx':
+        return SentenceTransformer(model_name, backend='onnx')
+    
+    target = cpu_quantization_target()
+    # The published avx2 file uses unsigned weights, the others signed ones
+    hub_file = f"onnx/model_{'quint8' if target == 'avx2' else 'qint8'}_{target}.onnx"
+    try:
+        return SentenceTransformer(model_name, backend='onnx', model_kwargs={'file_name': hub_file})
+    except Exception as e:
+        print(f"[v0] No pre-quantized {hub_file} for {model_name}, exporting one: {e}")
+    
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+    
+    directory = os.path.join(root, model_name.replace('/', '--'), 'sentence', backend)
+    local_file = f'onnx/model_qint8_{target}.onnx'
+    if not os.path.exists(os.path.join(directory, local_file)):
+        model = SentenceTransformer(model_name, backend='onnx')
+        model.save(directory)
+        export_dynamic_quantized_onnx_model(model, target, directory, file_suffix=f'qint8_{target}')
+    return SentenceTransformer(directory, backend='onnx', model_kwargs={'file_name': local_file})
+
+def embedding_cache_kind(storage=DEFAULT_EMBEDDING_STORAGE):
+    """Result cache kind for embeddings; each storage format gets its own entries"""
+    return 'embedding' if check_storage(storage) == 'float32' else f'embedding:{storage}'
+
+def pack_embedding(vector, storage=DEFAULT_EMBEDDING_STORAGE):
+    """Serialize one embedding; int8 stores a float32 scale followed by the codes"""
+    import numpy as np
+    
+    vector = np.asarray(vector, dtype='float32')
+    if storage == 'float16':
+        return vector.astype('float16').tobytes()
+    if storage == 'int8':
+        scale = np.float32(np.abs(vector).max() / 127 or 1.0)
+        codes = np.clip(np.rint(vector / scale), -127, 127).astype('int8')
+        return scale.tobytes() + codes.tobytes()
+    return vector.tobytes()
+
+def unpack_embedding(blob, storage=DEFAULT_EMBEDDING_STORAGE):
+    import numpy as np
+    
+    if storage == 'float16':
+        return np.frombuffer(blob, dtype='float16').astype('float32')
+    if storage == 'int8':
+        scale = np.frombuffer(blob[:4], dtype='float32')[0]
+        return np.frombuffer(blob[4:], dtype='int8').astype('float32') * scale
+    return np.frombuffer(blob, dtype='float32')
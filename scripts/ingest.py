@@ -0,0 +1,101 @@
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 10000
+
+def file_extension(file_path):
+    return file_path.split('.')[-1].lower()
+
+def is_json_lines(file_path):
+    """Check whether a .json file holds one JSON object per line"""
+    objects = 0
+    with open(file_path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if not (line.startswith('{') and line.endswith('}')):
+                return False
+            
+            # Two object lines in a row rule out a single-line JSON document
+            objects += 1
+            if objects == 2:
+                return True
+    return False
+
+def iter_csv_chunks(file_path, chunk_size):
+    yield from pd.read_csv(file_path, chunksize=chunk_size)
+
+def iter_json_chunks(file_path, chunk_size):
+    if file_extension(file_path) in ('jsonl', 'ndjson') or is_json_lines(file_path):
+        yield from pd.read_json(file_path, lines=True, chunksize=chunk_size)
+        return
+    
+    # A JSON array/object document can't be parsed incrementally with pandas alone;
+    # export large datasets as line-delimited JSON to keep memory bounded
+    yield from iter_frame_chunks(pd.read_json(file_path), chunk_size)
+
+def iter_xlsx_chunks(file_path, chunk_size):
+    from openpyxl import load_workbook
+    
+    # Read-only mode streams rows from the sheet XML instead of building the workbook
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        # The first sheet, like pd.read_excel; workbook.active is whichever sheet was open when saved
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        
+        columns = [name if name is not None else f'Unnamed: {i}' for i, name in enumerate(header)]
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunk_size:
+                yield pd.DataFrame(batch, columns=columns)
+                batch = []
+        
+        if batch:
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        workbook.close()
+
+def iter_docx_chunks(file_path, chunk_size):
+    from docx import Document
+    
+    doc = Document(file_path)
+    batch = []
+    for paragraph in doc.paragraphs:
+        if paragraph.text.strip():
+            batch.append(paragraph.text)
+            if len(batch) == chunk_size:
+                yield pd.DataFrame({'text': batch})
+                batch = []
+    
+    if batch:
+        yield pd.DataFrame({'text': batch})
+
+def iter_frame_chunks(df, chunk_size):
+    """Split an in-memory DataFrame into chunks, for formats that can't be streamed"""
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+def frame_records(df):
+    """Rows as dicts with missing cells as None, so they serialize as JSON null rather than NaN"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+CHUNK_READERS = {
+    'csv': iter_csv_chunks,
+    'json': iter_json_chunks,
+    'jsonl': iter_json_chunks,
+    'ndjson': iter_json_chunks,
+    'xlsx': iter_xlsx_chunks,
+    'docx': iter_docx_chunks,
+}
+
+def iter_file_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrames of at most chunk_size rows from a dataset file"""
+    reader = CHUNK_READERS.get(file_extension(file_path))
+    if reader is None:
+        raise ValueError(f"Unsupported file format: {file_extension(file_path)}")
+    
+    yield from reader(file_path, chunk_size)
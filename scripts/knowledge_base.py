@@ -0,0 +1,480 @@
+# Usage: python -m scripts.knowledge_base OUTPUT_DIR INPUT [INPUT ...] [--index IVF] [--storage int8] [--text-column text] [--rebuild]
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+from .embedding_backends import DEFAULT_EMBEDDING_STORAGE, EMBEDDING_STORAGE_FORMATS, check_storage
+from .ingest import file_extension, iter_file_chunks
+from .model_registry import SENTENCE_MODEL, model_revision
+from .result_cache import normalize_text
+from .retrieval import encode_texts
+
+# Named index layouts; any other value is passed to faiss.index_factory as-is.
+# '{nlist}' is filled in from the passage count when the index is built
+INDEX_FACTORIES = {
+    'Flat': 'Flat',
+    'IVF': 'IVF{nlist},Flat',
+    'HNSW': 'HNSW32,Flat',
+    'PQ': 'IVF{nlist},PQ{pq_m}x8',
+}
+DEFAULT_INDEX = 'Flat'
+
+# FAISS vector codecs for each embedding storage format
+STORAGE_CODECS = {'float32': 'Flat', 'float16': 'SQfp16', 'int8': 'SQ8'}
+
+# Passages embedded per batch while building
+BUILD_BATCH_SIZE = 4096
+
+# Vectors used to train IVF/PQ quantizers; faiss wants ~40 per centroid
+TRAINING_POINTS_PER_LIST = 40
+MAX_TRAINING_SIZE = 200000
+
+# Search-time knobs applied after build/load, e.g. {'nprobe': 16} or {'efSearch': 64}
+DEFAULT_SEARCH_PARAMS = {'nprobe': 16, 'efSearch': 64}
+
+INDEX_FILE = 'index.faiss'
+PASSAGES_FILE = 'passages.bin'
+OFFSETS_FILE = 'offsets.npy'
+IDS_FILE = 'ids.npy'
+META_FILE = 'meta.json'
+
+# Snapshot roots hold versions/vNNNNNN directories and a CURRENT file naming the live one
+VERSIONS_DIR = 'versions'
+CURRENT_FILE = 'CURRENT'
+DEFAULT_KEPT_SNAPSHOTS = 3
+
+def iter_passages(paths, text_column='text'):
+    """Yield passages from text files (one per line) and tabular/document files (one per row)"""
+    for path in paths:
+        if file_extension(path) in ('txt', 'md'):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        yield line
+            continue
+        
+        for chunk in iter_file_chunks(path):
+            column = text_column if text_column in chunk.columns else chunk.columns[0]
+            for text in chunk[column].dropna():
+                text = str(text).strip()
+                if text:
+                    yield text
+
+def index_factory_string(index_type, count, dimension):
+    """Resolve a named layout into a factory string sized for count passages"""
+    spec = INDEX_FACTORIES.get(index_type, index_type)
+    nlist = max(1, min(int(4 * count ** 0.5), count // TRAINING_POINTS_PER_LIST))
+    # PQ sub-quantizers must divide the dimension; 8 dims per code byte is a common trade-off
+    pq_m = next(m for m in (dimension // 8, 48, 32, 24, 16, 12, 8, 4, 2, 1) if m and dimension % m == 0)
+    return spec.format(nlist=nlist, pq_m=pq_m)
+
+def passage_id(passage):
+    """Stable 63-bit FAISS id derived from the passage content"""
+    digest = hashlib.sha256(normalize_text(passage).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') >> 1
+
+def id_mapped_factory(factory):
+    """IVF indexes store external ids natively; everything else is wrapped in IDMap2"""
+    return factory if factory.startswith('IVF') else f'IDMap2,{factory}'
+
+def storage_factory(factory, storage=DEFAULT_EMBEDDING_STORAGE):
+    """Swap the flat vector storage of a factory string for a scalar-quantized one"""
+    codec = STORAGE_CODECS[check_storage(storage)]
+    if factory == 'Flat':
+        return codec
+    if factory.endswith(',Flat'):
+        return factory[:-len('Flat')] + codec
+    # PQ and custom layouts already choose their own encoding
+    return factory
+
+def min_training_points(factory):
+    # 8-bit PQ codebooks need at least 256 points each
+    if 'PQ' in factory:
+        return 256
+    if factory.startswith('IVF'):
+        return TRAINING_POINTS_PER_LIST
+    return 1
+
+def make_index(dimension, factory):
+    import faiss
+    
+    return faiss.index_factory(dimension, id_mapped_factory(factory), faiss.METRIC_INNER_PRODUCT)
+
+class PassageStore:
+    """UTF-8 passages concatenated in one file with offsets and sorted ids, all memory-mapped"""
+    
+    def __init__(self, data, offsets, ids):
+        self.data = data
+        self.offsets = offsets
+        self.ids = ids
+    
+    @classmethod
+    def load(cls, directory):
+        import numpy as np
+        
+        offsets = np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode='r')
+        path = os.path.join(directory, PASSAGES_FILE)
+        data = np.memmap(path, dtype=np.uint8, mode='r') if os.path.getsize(path) else np.zeros(0, dtype=np.uint8)
+        
+        ids_path = os.path.join(directory, IDS_FILE)
+        ids = np.load(ids_path, mmap_mode='r') if os.path.exists(ids_path) else np.arange(len(offsets) - 1)
+        return cls(data, offsets, ids)
+    
+    @staticmethod
+    def write(directory, passages):
+        """Write {id: passage} sorted by id so lookups can binary-search the ids file"""
+        import numpy as np
+        
+        ids = sorted(passages)
+        offsets = [0]
+        with open(os.path.join(directory, PASSAGES_FILE), 'wb') as f:
+            for passage_id in ids:
+                encoded = passages[passage_id].encode('utf-8')
+                f.write(encoded)
+                offsets.append(offsets[-1] + len(encoded))
+        np.save(os.path.join(directory, OFFSETS_FILE), np.asarray(offsets, dtype=np.int64))
+        np.save(os.path.join(directory, IDS_FILE), np.asarray(ids, dtype=np.int64))
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def _position(self, passage_id):
+        import numpy as np
+        
+        position = int(np.searchsorted(self.ids, passage_id))
+        if position < len(self.ids) and self.ids[position] == passage_id:
+            return position
+        return None
+    
+    def __contains__(self, passage_id):
+        return self._position(passage_id) is not None
+    
+    def __getitem__(self, passage_id):
+        passage = self.get(passage_id)
+        if passage is None:
+            raise KeyError(passage_id)
+        return passage
+    
+    def get(self, passage_id, default=None):
+        position = self._position(passage_id)
+        if position is None:
+            return default
+        start, end = int(self.offsets[position]), int(self.offsets[position + 1])
+        return bytes(self.data[start:end]).decode('utf-8')
+    
+    def __iter__(self):
+        return (int(passage_id) for passage_id in self.ids)
+    
+    def items(self):
+        return ((passage_id, self.get(passage_id)) for passage_id in self)
+
+class KnowledgeBase:
+    """RAG passages with a FAISS inner-product index over L2-normalized embeddings (cosine similarity)
+    
+    Passages are keyed by a content hash, so add/delete/sync only embed passages that
+    are new. Mutate a copy() and publish it with save_snapshot(); readers keep
+    searching the old object until they pick up the new one.
+    """
+    
+    def __init__(self, index, passages, meta=None, mapped_from=None):
+        self.index = index
+        self.passages = passages
+        self.meta = meta or {}
+        # Directory whose index file self.index is memory-mapped from, if it is
+        self.mapped_from = mapped_from
+    
+    def __len__(self):
+        return len(self.passages)
+    
+    @property
+    def ntotal(self):
+        return self.index.ntotal
+    
+    @classmethod
+    def build(cls, passages, sentence_model, index_type=DEFAULT_INDEX, batch_size=BUILD_BATCH_SIZE,
+              search_params=None, storage=DEFAULT_EMBEDDING_STORAGE):
+        """Embed passages in normalized batches and add them to a freshly trained index
+        
+        storage='float16' or 'int8' keeps the vectors scalar-quantized in the index.
+        """
+        import numpy as np
+        
+        by_id = {passage_id(passage): passage for passage in passages}
+        ids = list(by_id)
+        if not ids:
+            raise ValueError("Knowledge base has no passages")
+        
+        first = normalized(encode_texts(sentence_model, [by_id[i] for i in ids[:batch_size]]))
+        dimension = first.shape[1]
+        factory = storage_factory(index_factory_string(index_type, len(ids), dimension), storage)
+        index = make_index(dimension, factory)
+        added = 0
+        
+        if not index.is_trained:
+            # Train on a prefix sample; small knowledge bases fall back to exact search
+            training_size = min(len(ids), MAX_TRAINING_SIZE)
+            if training_size < min_training_points(factory):
+                print(f"[v0] {len(ids)} passages are too few to train {factory}; using Flat")
+                factory = storage_factory('Flat', storage)
+                index = make_index(dimension, factory)
+        
+        if not index.is_trained:
+            training = [first] + [
+                normalized(encode_texts(sentence_model, [by_id[i] for i in ids[start:start + batch_size]]))
+                for start in range(batch_size, min(len(ids), MAX_TRAINING_SIZE), batch_size)
+            ]
+            training = np.vstack(training)
+            index.train(training)
+            index.add_with_ids(training, np.asarray(ids[:len(training)], dtype=np.int64))
+            added = len(training)
+            first = None
+        
+        if first is not None:
+            index.add_with_ids(first, np.asarray(ids[:len(first)], dtype=np.int64))
+            added = len(first)
+        
+        for start in range(added, len(ids), batch_size):
+            batch_ids = ids[start:start + batch_size]
+            index.add_with_ids(
+                normalized(encode_texts(sentence_model, [by_id[i] for i in batch_ids])),
+                np.asarray(batch_ids, dtype=np.int64)
+            )
+            print(f"[v0] Embedded {index.ntotal} of {len(ids)} passages")
+        
+        meta = {
+            'model': SENTENCE_MODEL,
+            'revision': model_revision(sentence_model),
+            'index_factory': factory,
+            'storage': storage,
+            'dimension': dimension,
+            'count': len(ids)
+        }
+        knowledge_base = cls(index, by_id, meta)
+        knowledge_base.configure(search_params)
+        return knowledge_base
+    
+    @classmethod
+    def load(cls, path, mmap=True, search_params=None):
+        """Load a knowledge base directory, or the CURRENT version of a snapshot root
+        
+        The index is memory-mapped where faiss supports it; pass mmap=False to
+        load a copy that can be updated in place.
+        """
+        import faiss
+        
+        version = current_version(path)
+        directory = os.path.join(path, VERSIONS_DIR, version) if version else path
+        
+        with open(os.path.join(directory, META_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('model') != SENTENCE_MODEL:
+            raise ValueError(f"Knowledge base was embedded with {meta.get('model')}, not {SENTENCE_MODEL}")
+        meta['version'] = version
+        
+        index_path = os.path.join(directory, INDEX_FILE)
+        mapped_from = directory if mmap else None
+        try:
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0)
+        except RuntimeError:
+            # Not every index type can be mapped; read it into memory instead
+            index = faiss.read_index(index_path)
+            mapped_from = None
+        
+        passages = PassageStore.load(directory)
+        if not mmap:
+            passages = dict(passages.items())
+        
+        knowledge_base = cls(index, passages, meta, mapped_from)
+        knowledge_base.configure(search_params)
+        return knowledge_base
+    
+    def save(self, directory):
+        import faiss
+        
+        os.makedirs(directory, exist_ok=True)
+        faiss.write_index(self.index, os.path.join(directory, INDEX_FILE))
+        PassageStore.write(directory, dict(self.passages.items()))
+        with open(os.path.join(directory, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump({**self.meta, 'count': len(self.passages)}, f, indent=2)
+        return directory
+    
+    def save_snapshot(self, root, keep=DEFAULT_KEPT_SNAPSHOTS):
+        """Write a new version under root and atomically point CURRENT at it"""
+        versions = os.path.join(root, VERSIONS_DIR)
+        os.makedirs(versions, exist_ok=True)
+        
+        existing = sorted(name for name in os.listdir(versions) if name.startswith('v'))
+        version = f"v{int(existing[-1][1:]) + 1 if existing else 1:06d}"
+        
+        # Write into a temporary directory first so a half-written version is never visible
+        staging = os.path.join(versions, f'.{version}.tmp')
+        self.save(staging)
+        os.rename(staging, os.path.join(versions, version))
+        
+        pointer = os.path.join(root, f'.{CURRENT_FILE}.tmp')
+        with open(pointer, 'w', encoding='utf-8') as f:
+            f.write(version)
+        os.replace(pointer, os.path.join(root, CURRENT_FILE))
+        self.meta['version'] = version
+        
+        # Old versions may still be memory-mapped by readers, so a few are kept around
+        for stale in (existing + [version])[:-keep]:
+            shutil.rmtree(os.path.join(versions, stale), ignore_errors=True)
+        return version
+    
+    def copy(self):
+        """In-memory copy that can be updated while this one keeps serving searches"""
+        import faiss
+        
+        if self.mapped_from is not None:
+            # faiss can't clone memory-mapped IVF/PQ lists; the file holds the same index, so read it in
+            index = faiss.read_index(os.path.join(self.mapped_from, INDEX_FILE))
+        else:
+            index = faiss.clone_index(self.index)
+        
+        knowledge_base = KnowledgeBase(index, dict(self.passages.items()), dict(self.meta))
+        knowledge_base.configure()
+        return knowledge_base
+    
+    def add(self, passages, sentence_model, batch_size=BUILD_BATCH_SIZE):
+        """Embed and index passages whose content is not in the knowledge base yet"""
+        import numpy as np
+        
+        new = {}
+        for passage in passages:
+            new_id = passage_id(passage)
+            if new_id not in self.passages:
+                new[new_id] = passage
+        
+        ids = list(new)
+        for start in range(0, len(ids), batch_size):
+            batch_ids = ids[start:start + batch_size]
+            self.index.add_with_ids(
+                normalized(encode_texts(sentence_model, [new[i] for i in batch_ids])),
+                np.asarray(batch_ids, dtype=np.int64)
+            )
+        self.writable_passages().update(new)
+        return ids
+    
+    def delete(self, passages=(), ids=()):
+        """Remove passages (by text or id) from the index and the passage store"""
+        import numpy as np
+        
+        remove = [i for i in list(ids) + [passage_id(passage) for passage in passages] if i in self.passages]
+        if not remove:
+            return []
+        
+        try:
+            self.index.remove_ids(np.asarray(remove, dtype=np.int64))
+        except RuntimeError:
+            # Graph indexes such as HNSW can't delete; rebuild from the stored vectors instead
+            self.rebuild_without(remove)
+        
+        passages_by_id = self.writable_passages()
+        for i in remove:
+            del passages_by_id[i]
+        return remove
+    
+    def update(self, old_passage, new_passage, sentence_model):
+        """Replace one passage; only the new text is embedded"""
+        self.delete([old_passage])
+        return self.add([new_passage], sentence_model)
+    
+    def sync(self, passages, sentence_model):
+        """Make the knowledge base hold exactly passages, embedding only the new ones"""
+        wanted = {passage_id(passage) for passage in passages}
+        removed = self.delete(ids=[i for i in self.passages if i not in wanted])
+        added = self.add(passages, sentence_model)
+        return added, removed
+    
+    def writable_passages(self):
+        if not isinstance(self.passages, dict):
+            self.passages = dict(self.passages.items())
+        return self.passages
+    
+    def rebuild_without(self, remove):
+        import faiss
+        import numpy as np
+        
+        inner = faiss.downcast_index(self.index.index)
+        ids = faiss.vector_to_array(self.index.id_map)
+        vectors = inner.reconstruct_n(0, inner.ntotal)
+        keep = ~np.isin(ids, np.asarray(remove, dtype=np.int64))
+        
+        index = make_index(vectors.shape[1], self.meta['index_factory'])
+        if not index.is_trained:
+            index.train(vectors[keep])
+        index.add_with_ids(vectors[keep], ids[keep])
+        self.index = index
+        self.configure()
+    
+    def configure(self, search_params=None):
+        """Apply nprobe/efSearch style parameters the index understands"""
+        import faiss
+        
+        params = {**DEFAULT_SEARCH_PARAMS, **(search_params or {})}
+        space = faiss.ParameterSpace()
+        for name, value in params.items():
+            try:
+                space.set_index_parameter(self.index, name, value)
+            except RuntimeError:
+                continue
+    
+    def search_ids(self, embeddings, k):
+        """Passage ids of the k nearest neighbours for each (already normalized) query row"""
+        _, ids = self.index.search(embeddings, min(k, self.ntotal))
+        return [[i for i in row if i >= 0] for row in ids.tolist()]
+    
+    def search(self, embeddings, k):
+        """Passages of the k nearest neighbours for each (already normalized) query row"""
+        return [[self.passages.get(i) for i in row] for row in self.search_ids(embeddings, k)]
+
+def current_version(root):
+    """Version name CURRENT points at, or None for a plain knowledge base directory"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def normalized(embeddings):
+    """L2-normalize rows in place so inner product equals cosine similarity"""
+    import faiss
+    
+    faiss.normalize_L2(embeddings)
+    return embeddings
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or update a persisted knowledge base for RAG retrieval')
+    parser.add_argument('output', help='snapshot root to write a new version of the index and passage store to')
+    parser.add_argument('inputs', nargs='+', help='.txt (one passage per line), .csv, .json(l), .xlsx or .docx files')
+    parser.add_argument('--index', default=DEFAULT_INDEX, help=f"one of {', '.join(INDEX_FACTORIES)} or a faiss factory string")
+    parser.add_argument('--storage', default=DEFAULT_EMBEDDING_STORAGE, choices=EMBEDDING_STORAGE_FORMATS,
+                        help='vector precision kept in the index')
+    parser.add_argument('--text-column', default='text')
+    parser.add_argument('--rebuild', action='store_true', help='re-embed everything instead of updating the current version')
+    args = parser.parse_args(argv)
+    
+    from .model_registry import get_sentence_model
+    
+    passages = list(dict.fromkeys(iter_passages(args.inputs, args.text_column)))
+    sentence_model = get_sentence_model()
+    
+    if current_version(args.output) and not args.rebuild:
+        knowledge_base = KnowledgeBase.load(args.output, mmap=False)
+        added, removed = knowledge_base.sync(passages, sentence_model)
+        print(f"[v0] Updated knowledge base: {len(added)} added, {len(removed)} removed")
+    else:
+        print(f"[v0] Building {args.index} knowledge base from {len(passages)} passages")
+        knowledge_base = KnowledgeBase.build(passages, sentence_model, args.index, storage=args.storage)
+    
+    version = knowledge_base.save_snapshot(args.output)
+    print(f"[v0] Saved knowledge base version {version} to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+import json
+import os
+import re
+import threading
+
+# Built-in keyword lists behind the explanation heuristics
+DEFAULT_LEXICON = {
+    'positive': ['love', 'amazing', 'excellent', 'great', 'wonderful', 'fantastic'],
+    'negative': ['hate', 'terrible', 'awful', 'bad', 'horrible', 'disappointed']
+}
+
+# Tweets lean on a few extra intensifiers
+TWEET_LEXICON = {
+    'positive': DEFAULT_LEXICON['positive'] + ['awesome', 'perfect'],
+    'negative': DEFAULT_LEXICON['negative'] + ['worst', 'disgusting']
+}
+
+def trie_pattern(terms):
+    """Regex alternation shaped like a trie so shared prefixes are matched once"""
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    
+    def build(node):
+        terminal = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A term ending here makes the longer continuations optional
+        return f'(?:{body})?' if terminal else body
+    
+    return build(trie)
+
+def load_lexicon_file(path):
+    """{category: [terms]} from a .json file, or one term per line from a text file named after its category"""
+    with open(path, encoding='utf-8') as f:
+        if path.lower().endswith('.json'):
+            return {category: list(terms) for category, terms in json.load(f).items()}
+        
+        category = os.path.splitext(os.path.basename(path))[0]
+        terms = [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+        return {category: terms}
+
+def compile_matcher(categories):
+    """(pattern, {term: category}) for {category: [terms]}; the first category listing a term wins"""
+    term_categories = {}
+    for category, terms in categories.items():
+        for term in filter(None, (term.strip() for term in terms)):
+            term_categories.setdefault(term.lower(), category)
+    
+    if term_categories:
+        pattern = re.compile(rf'(?<!\w){trie_pattern(term_categories)}(?!\w)', re.IGNORECASE)
+    else:
+        pattern = None
+    return pattern, term_categories
+
+class Lexicon:
+    """Categorized keyword lexicon matched on word boundaries in one regex pass per text
+    
+    Lexicon files are re-read whenever their modification time changes, so
+    terms can be edited while a long-running service keeps using the lexicon.
+    """
+    
+    def __init__(self, categories=None, paths=()):
+        self.base = {category: list(terms) for category, terms in (categories or {}).items()}
+        self.paths = list(paths)
+        self._mtimes = None
+        self._lock = threading.Lock()
+        self._compiled = None
+        self._error = None
+        self.refresh()
+    
+    @classmethod
+    def from_files(cls, paths, base=DEFAULT_LEXICON):
+        return cls(base, paths)
+    
+    def _file_mtimes(self):
+        return tuple(os.path.getmtime(path) for path in self.paths)
+    
+    def refresh(self):
+        """Rebuild the matcher if any lexicon file changed since it was compiled
+        
+        A lexicon file that is missing or half-written keeps the last compiled
+        matcher (the built-in terms before anything compiled) until it reads cleanly.
+        """
+        try:
+            mtimes = self._file_mtimes()
+            if self._compiled is not None and mtimes == self._mtimes:
+                return False
+            
+            with self._lock:
+                if self._compiled is not None and mtimes == self._mtimes:
+                    return False
+                
+                categories = {category: list(terms) for category, terms in self.base.items()}
+                for path in self.paths:
+                    for category, terms in load_lexicon_file(path).items():
+                        categories.setdefault(category, []).extend(terms)
+                
+                # Swap in one assignment so concurrent readers see a consistent matcher
+                self._compiled = compile_matcher(categories)
+                self._mtimes = mtimes
+                self._error = None
+                return True
+        except (OSError, ValueError) as e:
+            with self._lock:
+                # Warn once per distinct problem rather than on every batch
+                if str(e) != self._error:
+                    self._error = str(e)
+                    print(f"[v0] Could not reload lexicon files, keeping the previous terms: {e}")
+                if self._compiled is None:
+                    self._compiled = compile_matcher(self.base)
+            return False
+    
+    @property
+    def categories(self):
+        grouped = {}
+        for term, category in self._compiled[1].items():
+            grouped.setdefault(category, []).append(term)
+        return grouped
+    
+    def find(self, text):
+        """Lexicon hits as {'term', 'category', 'start', 'end'} in order of appearance"""
+        pattern, term_categories = self._compiled
+        if pattern is None or not isinstance(text, str):
+            return []
+        
+        hits = []
+        for match in pattern.finditer(text):
+            term = match.group(0).lower()
+            hits.append({
+                'term': term,
+                'category': term_categories.get(term),
+                'start': match.start(),
+                'end': match.end()
+            })
+        return hits
+    
+    def find_all(self, texts):
+        """Hits for a batch of texts, picking up lexicon file edits first"""
+        if self.paths:
+            self.refresh()
+        return [self.find(text) for text in texts]
+
+def keyword_explanation(sentiment, hits):
+    """Explanation sentence for a prediction given the lexicon hits in its text"""
+    found_positive = list(dict.fromkeys(hit['term'] for hit in hits if hit['category'] == 'positive'))
+    found_negative = list(dict.fromkeys(hit['term'] for hit in hits if hit['category'] == 'negative'))
+    
+    if found_positive and sentiment == 'POSITIVE':
+        return f"Keywords '{', '.join(found_positive)}' indicate positive sentiment"
+    if found_negative and sentiment == 'NEGATIVE':
+        return f"Keywords '{', '.join(found_negative)}' indicate negative sentiment"
+    if sentiment == 'NEUTRAL':
+        return "Neutral language with no strong emotional indicators"
+    return f"Overall tone and context suggest {sentiment.lower()} sentiment"
@@ -0,0 +1,150 @@
+import collections
+import threading
+import time
+from concurrent.futures import Future
+
+# How long the first queued item may wait for others to join its batch
+DEFAULT_MAX_WAIT_MS = 5.0
+
+# Recent per-item waits kept for the percentile metrics
+WAIT_SAMPLES = 4096
+
+class MicroBatcher:
+    """Coalesces predict calls from concurrent threads into shared batches
+    
+    Items are collected until max_batch_size of them are queued or the oldest
+    has waited max_wait_ms, then predict(list) runs once and each caller's
+    future gets its own result. A failing batch is retried item by item so one
+    bad input only fails its own future.
+    """
+    
+    def __init__(self, predict, max_batch_size, max_wait_ms=DEFAULT_MAX_WAIT_MS, name='batcher'):
+        self.predict = predict
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self._pending = collections.deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+        
+        self._batches = 0
+        self._items = 0
+        self._histogram = collections.Counter()
+        self._waits = collections.deque(maxlen=WAIT_SAMPLES)
+    
+    def submit(self, items):
+        """Queue items, returning one concurrent.futures.Future per item"""
+        futures = [Future() for _ in items]
+        now = time.perf_counter()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._pending.extend((item, future, now) for item, future in zip(items, futures))
+            self._condition.notify()
+        return futures
+    
+    def __call__(self, items):
+        """Blocking form of submit: results in the order of items"""
+        return [future.result() for future in self.submit(list(items))]
+    
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+    
+    def _next_batch(self):
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+            if not self._pending:
+                return None
+            
+            # The window is anchored on the oldest item so no caller waits much past max_wait
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            
+            return [self._pending.popleft() for _ in range(min(self.max_batch_size, len(self._pending)))]
+    
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._process(batch)
+    
+    def _process(self, batch):
+        started = time.perf_counter()
+        items = [item for item, _, _ in batch]
+        futures = [future for _, future, _ in batch]
+        
+        with self._condition:
+            self._batches += 1
+            self._items += len(batch)
+            # Power-of-two buckets: 1, 2, 4, ... up to max_batch_size
+            self._histogram[1 << (len(batch) - 1).bit_length()] += 1
+            self._waits.extend(started - queued for _, _, queued in batch)
+        
+        try:
+            results = self.predict(items)
+            if len(results) != len(items):
+                raise ValueError(f"{self.name} returned {len(results)} results for {len(items)} items")
+        except Exception:
+            for item, future in zip(items, futures):
+                try:
+                    future.set_result(self.predict([item])[0])
+                except Exception as e:
+                    future.set_exception(e)
+            return
+        
+        for future, result in zip(futures, results):
+            future.set_result(result)
+    
+    def metrics(self):
+        """Queue depth, batch-size histogram and per-item wait times (ms)"""
+        with self._condition:
+            waits = sorted(self._waits)
+            metrics = {
+                'queue_depth': len(self._pending),
+                'batches': self._batches,
+                'items': self._items,
+                'mean_batch_size': self._items / self._batches if self._batches else 0.0,
+                'batch_size_histogram': dict(sorted(self._histogram.items()))
+            }
+        
+        def percentile(q):
+            return waits[min(len(waits) - 1, int(q * len(waits)))] * 1000 if waits else 0.0
+        
+        metrics['wait_ms'] = {
+            'mean': sum(waits) / len(waits) * 1000 if waits else 0.0,
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+            'max': waits[-1] * 1000 if waits else 0.0
+        }
+        return metrics
+
+class BatchedEncoder:
+    """Drop-in for a SentenceTransformer whose encode() goes through a MicroBatcher"""
+    
+    def __init__(self, sentence_model, batcher):
+        self.sentence_model = sentence_model
+        self.batcher = batcher
+    
+    def encode(self, texts, **kwargs):
+        import numpy as np
+        
+        return np.vstack(self.batcher(texts)) if len(texts) else np.zeros((0, 0), dtype='float32')
+    
+    def close(self):
+        self.batcher.close()
+    
+    def __getitem__(self, index):
+        # model_revision() reads the hub revision from the wrapped model's first module
+        return self.sentence_model[index]
@@ -0,0 +1,218 @@
+import gc
+import os
+import threading
+import time
+
+from .attributions import TokenAttributor
+from .embedding_backends import (
+    DEFAULT_EMBEDDING_STORAGE, DEFAULT_SENTENCE_BACKEND, check_sentence_backend, load_sentence_model
+)
+from .micro_batching import DEFAULT_MAX_WAIT_MS, BatchedEncoder, MicroBatcher
+from .sentiment_backends import DEFAULT_SENTIMENT_BACKEND, check_backend, load_backend_pipeline
+from .sentiment_engine import SentimentEngine
+
+SENTIMENT_MODEL = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+SENTENCE_MODEL = 'all-MiniLM-L6-v2'
+
+# Loaded objects keyed by tuples whose first element names the model they depend on
+_models = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+# Texts per coalesced forward pass of the sentence model
+SENTENCE_BATCH_SIZE = 64
+
+# Seconds between checks for a newly published knowledge base snapshot
+KNOWLEDGE_BASE_REFRESH_SECONDS = 5.0
+_refreshed_at = {}
+
+def _lock_for(key):
+    """Return the lock guarding a single registry entry"""
+    with _registry_lock:
+        return _locks.setdefault(key, threading.Lock())
+
+def _get_or_load(key, loader):
+    """Return a cached object, loading it once even under concurrent callers"""
+    model = _models.get(key)
+    if model is not None:
+        return model
+    
+    with _lock_for(key):
+        model = _models.get(key)
+        if model is None:
+            model = loader()
+            _models[key] = model
+    
+    return model
+
+def _load_sentiment_pipeline():
+    from transformers import pipeline
+    
+    print(f"[v0] Loading sentiment model {SENTIMENT_MODEL}...")
+    return pipeline("sentiment-analysis", model=SENTIMENT_MODEL)
+
+def _load_sentence_model():
+    from sentence_transformers import SentenceTransformer
+    
+    print(f"[v0] Loading sentence model {SENTENCE_MODEL}...")
+    return SentenceTransformer(SENTENCE_MODEL)
+
+def get_sentiment_pipeline(backend=DEFAULT_SENTIMENT_BACKEND):
+    """Shared sentiment-analysis pipeline for an inference backend, loaded on first use"""
+    if check_backend(backend) == 'torch':
+        return _get_or_load(('sentiment',), _load_sentiment_pipeline)
+    
+    return _get_or_load(
+        ('sentiment', 'backend', backend),
+        lambda: load_backend_pipeline(backend, SENTIMENT_MODEL, reference=get_sentiment_pipeline)
+    )
+
+def get_sentiment_engine(batch_size, backend=DEFAULT_SENTIMENT_BACKEND):
+    """Shared batched engine over the sentiment pipeline for a given batch size and backend"""
+    return _get_or_load(
+        ('sentiment', 'engine', batch_size, backend),
+        lambda: SentimentEngine(get_sentiment_pipeline(backend), batch_size=batch_size)
+    )
+
+def get_token_attributor(mode):
+    """Shared token attributor for one attribution mode, always over the eager pipeline (it needs gradients)"""
+    return _get_or_load(
+        ('sentiment', 'attributor', mode),
+        lambda: TokenAttributor(get_sentiment_pipeline(), mode=mode)
+    )
+
+def get_sentence_model(backend=DEFAULT_SENTENCE_BACKEND):
+    """Shared sentence transformer used for RAG retrieval on an inference backend, loaded on first use"""
+    if check_sentence_backend(backend) == 'torch':
+        return _get_or_load(('sentence',), _load_sentence_model)
+    
+    def load():
+        print(f"[v0] Loading sentence model {SENTENCE_MODEL} ({backend})...")
+        return load_sentence_model(SENTENCE_MODEL, backend)
+    
+    return _get_or_load(('sentence', 'backend', backend), load)
+
+def get_sentiment_batcher(batch_size, backend=DEFAULT_SENTIMENT_BACKEND, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+    """Shared micro-batcher that coalesces sentiment scoring from concurrent callers"""
+    return _get_or_load(
+        ('sentiment', 'batcher', batch_size, backend, max_wait_ms),
+        lambda: MicroBatcher(
+            get_sentiment_engine(batch_size, backend).score, batch_size, max_wait_ms, name=f'sentiment-{backend}'
+        )
+    )
+
+def get_batched_sentence_model(backend=DEFAULT_SENTENCE_BACKEND, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+    """Shared sentence model whose encode() calls from concurrent callers are coalesced"""
+    def load():
+        sentence_model = get_sentence_model(backend)
+        
+        def encode(texts):
+            return list(sentence_model.encode(texts, batch_size=SENTENCE_BATCH_SIZE, convert_to_numpy=True))
+        
+        return BatchedEncoder(
+            sentence_model, MicroBatcher(encode, SENTENCE_BATCH_SIZE, max_wait_ms, name=f'sentence-{backend}')
+        )
+    
+    return _get_or_load(('sentence', 'batcher', backend, max_wait_ms), load)
+
+def get_knowledge_base_index(knowledge_base, backend=DEFAULT_SENTENCE_BACKEND, storage=DEFAULT_EMBEDDING_STORAGE):
+    """Shared in-memory knowledge base over a passage list, built once per distinct list
+    
+    A new list is derived from the most recently built one with the same backend
+    and storage, so only passages that were not indexed before get embedded.
+    """
+    def build():
+        from .knowledge_base import KnowledgeBase
+        
+        sentence_model = get_sentence_model(backend)
+        previous = [
+            model for key, model in list(_models.items())
+            if key[:4] == ('sentence', 'knowledge_base', backend, storage)
+        ]
+        if not previous:
+            return KnowledgeBase.build(list(knowledge_base), sentence_model, storage=storage)
+        
+        derived = previous[-1].copy()
+        added, removed = derived.sync(list(knowledge_base), sentence_model)
+        print(f"[v0] Derived knowledge base: {len(added)} passages embedded, {len(removed)} removed")
+        return derived
+    
+    return _get_or_load(('sentence', 'knowledge_base', backend, storage, tuple(knowledge_base)), build)
+
+def get_knowledge_base(path):
+    """Shared knowledge base persisted under path, loaded (not rebuilt) on first use
+    
+    For snapshot roots the CURRENT version is rechecked every
+    KNOWLEDGE_BASE_REFRESH_SECONDS and a newly published version is swapped in;
+    searches already running keep the object they started with.
+    """
+    from .knowledge_base import KnowledgeBase, current_version
+    
+    def load():
+        print(f"[v0] Loading knowledge base from {path}...")
+        return KnowledgeBase.load(path)
+    
+    key = ('sentence', 'knowledge_base_path', os.path.abspath(path))
+    knowledge_base = _get_or_load(key, load)
+    
+    now = time.monotonic()
+    if now - _refreshed_at.get(key, now - KNOWLEDGE_BASE_REFRESH_SECONDS) < KNOWLEDGE_BASE_REFRESH_SECONDS:
+        return knowledge_base
+    _refreshed_at[key] = now
+    
+    version = current_version(path)
+    if version is None or version == knowledge_base.meta.get('version'):
+        return knowledge_base
+    
+    with _lock_for(key):
+        current = _models.get(key)
+        if current is None or current.meta.get('version') != version:
+            print(f"[v0] Switching knowledge base {path} to version {version}")
+            current = load()
+            _models[key] = current
+    return current
+
+def model_revision(model):
+    """Hub commit hash of a loaded pipeline or sentence transformer, used in cache keys"""
+    # Pipelines expose the HF model directly; sentence transformers wrap it in their first module
+    hf_model = getattr(model, 'model', None)
+    if hf_model is None:
+        try:
+            hf_model = getattr(model[0], 'auto_model', None)
+        except Exception:
+            hf_model = None
+    
+    config = getattr(hf_model, 'config', None)
+    return getattr(config, '_commit_hash', None) or 'unknown'
+
+def warmup(sentiment=True, sentence=True, knowledge_base=None, sentiment_backend=DEFAULT_SENTIMENT_BACKEND,
+           sentence_backend=DEFAULT_SENTENCE_BACKEND):
+    """Preload models up front, e.g. once per worker before taking jobs
+    
+    knowledge_base is either a passage list or the directory of a persisted knowledge base.
+    """
+    if sentiment:
+        get_sentiment_pipeline(sentiment_backend)
+    if sentence:
+        get_sentence_model(sentence_backend)
+    if isinstance(knowledge_base, str):
+        get_knowledge_base(knowledge_base)
+    elif knowledge_base is not None:
+        get_knowledge_base_index(knowledge_base, sentence_backend)
+
+def unload(*names):
+    """Drop loaded models (all of them if no names are given) and anything built on them"""
+    with _registry_lock:
+        keys = [key for key in _models if not names or key[0] in names]
+        for key in keys:
+            model = _models.pop(key)
+            # Batcher threads would otherwise keep the unloaded model alive
+            if isinstance(model, (MicroBatcher, BatchedEncoder)):
+                model.close()
+    
+    gc.collect()
+    return keys
+
+def loaded_models():
+    """List the registry entries that are currently loaded"""
+    return list(_models)
@@ -0,0 +1,89 @@
+import os
+
+# 'layout' runs pdfplumber's character layout analysis, 'fast' reads the raw
+# text layer through pypdfium2 (already installed as a pdfplumber dependency)
+PDF_EXTRACTION_MODES = ('layout', 'fast')
+DEFAULT_PDF_EXTRACTION_MODE = 'layout'
+
+# Upper bound on pages handed to a worker at once; smaller ranges balance
+# uneven pages across workers, larger ones amortize reopening the document
+DEFAULT_PAGES_PER_TASK = 16
+
+def page_count(pdf_path):
+    import pypdfium2
+    
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+def extract_page_range(pdf_path, start, end, mode=DEFAULT_PDF_EXTRACTION_MODE):
+    """Text of pages [start, end), with '' for pages without a text layer"""
+    if mode == 'fast':
+        import pypdfium2
+        
+        pdf = pypdfium2.PdfDocument(pdf_path)
+        try:
+            texts = []
+            for page_number in range(start, end):
+                page = pdf[page_number]
+                textpage = page.get_textpage()
+                texts.append(textpage.get_text_range().replace('\r\n', '\n'))
+                textpage.close()
+                page.close()
+            return texts
+        finally:
+            pdf.close()
+    
+    import pdfplumber
+    
+    with pdfplumber.open(pdf_path, pages=list(range(start + 1, end + 1))) as pdf:
+        texts = []
+        for page in pdf.pages:
+            texts.append(page.extract_text() or '')
+            # Drop cached layout objects so long ranges don't accumulate memory
+            page.flush_cache()
+        return texts
+
+def page_ranges(pages, workers, pages_per_task=DEFAULT_PAGES_PER_TASK):
+    """Split pages into contiguous ranges so every worker gets several tasks"""
+    size = max(1, min(pages_per_task, -(-pages // (workers * 4))))
+    return [(start, min(start + size, pages)) for start in range(0, pages, size)]
+
+def iter_pdf_pages(pdf_path, workers=None, mode=DEFAULT_PDF_EXTRACTION_MODE, pages_per_task=DEFAULT_PAGES_PER_TASK):
+    """Yield the text of every page in order, extracting page ranges across a process pool"""
+    if mode not in PDF_EXTRACTION_MODES:
+        raise ValueError(f"Unsupported PDF extraction mode: {mode}")
+    
+    pages = page_count(pdf_path)
+    workers = min(workers or os.cpu_count() or 1, pages)
+    ranges = page_ranges(pages, max(workers, 1), pages_per_task)
+    
+    if workers <= 1 or len(ranges) == 1:
+        for start, end in ranges:
+            yield from extract_page_range(pdf_path, start, end, mode)
+        return
+    
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    
+    # Spawned rather than forked: this runs on pipeline or service threads while model and
+    # batcher threads are alive, and the workers only need the path and page range.
+    # Each worker opens the file itself; map() hands back ranges in page order
+    # while later ranges are still being extracted
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        results = executor.map(
+            extract_page_range,
+            [pdf_path] * len(ranges),
+            [start for start, _ in ranges],
+            [end for _, end in ranges],
+            [mode] * len(ranges)
+        )
+        for texts in results:
+            yield from texts
+
+def extract_pdf_text(pdf_path, workers=None, mode=DEFAULT_PDF_EXTRACTION_MODE):
+    """Whole-document text with one newline-terminated block per non-empty page"""
+    return ''.join(f'{text}\n' for text in iter_pdf_pages(pdf_path, workers, mode) if text)
@@ -0,0 +1,265 @@
+import contextvars
+import queue
+import threading
+import time
+
+from .aggregation import SentimentAggregator
+from .columnar import ColumnarResults, concat_rows
+from .dedup import DedupCounter, score_groups
+from .result_cache import merge_stats, track_stats
+
+# 'full' scores every row, 'sample' scores a stratified preview
+ANALYSIS_MODES = ('full', 'sample')
+
+# Per-row result lists returned for every analyzed column
+RESULT_KEYS = ('baseline_sentiment', 'rag_sentiment', 'explanations')
+
+# Sentinel passed down the stage queues once the upstream stage is finished
+_DONE = object()
+
+class ThroughputMeter:
+    """Rows processed so far and the rate since the meter was started"""
+    
+    def __init__(self):
+        self.rows = 0
+        self.started = time.perf_counter()
+    
+    def add(self, rows):
+        self.rows += rows
+    
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+    
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed > 0 else 0.0
+    
+    def report(self):
+        return {
+            'rows': self.rows,
+            'seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1)
+        }
+
+def run_pipeline(items, infer, aggregate, queue_size=2):
+    """Run read -> infer -> aggregate over items with the three stages overlapping"""
+    # Each stage runs in its own thread; bounded queues keep at most queue_size
+    # chunks in flight so reading never races far ahead of inference
+    read_queue = queue.Queue(maxsize=queue_size)
+    aggregate_queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    
+    def put(target, item):
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def get(source):
+        while True:
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                if stop.is_set():
+                    return _DONE
+    
+    def read():
+        try:
+            for item in items:
+                # Stop parsing the input as soon as a later stage has failed
+                if stop.is_set():
+                    break
+                put(read_queue, item)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            put(read_queue, _DONE)
+    
+    def run_infer():
+        try:
+            item = get(read_queue)
+            while item is not _DONE and not stop.is_set():
+                put(aggregate_queue, infer(item))
+                item = get(read_queue)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            put(aggregate_queue, _DONE)
+    
+    def run_aggregate():
+        try:
+            item = get(aggregate_queue)
+            while item is not _DONE:
+                aggregate(item)
+                item = get(aggregate_queue)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+    
+    # Each stage runs in its own copy of the caller's context, so per-run state such as
+    # the cache counters of track_stats() follows the work onto the stage threads
+    threads = [
+        threading.Thread(target=contextvars.copy_context().run, args=(target,), daemon=True)
+        for target in (read, run_infer, run_aggregate)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    if errors:
+        raise errors[0]
+
+def frame_to_column_chunk(rows):
+    """Build a pipeline chunk from a DataFrame of text columns with None for missing values"""
+    return {
+        'rows': len(rows),
+        'texts': {column: rows[column].dropna().tolist() for column in rows.columns}
+    }
+
+def rows_to_column_chunk(columns, rows):
+    """Build a pipeline chunk from row tuples ordered like columns"""
+    return {
+        'rows': len(rows),
+        'texts': {column: [row[i] for row in rows if row[i] is not None] for i, column in enumerate(columns)}
+    }
+
+def summarize_column(aggregator, per_row=None):
+    """Final results for one analyzed column"""
+    return {
+        **(per_row or {}),
+        'sentiment_distribution': aggregator.sentiment_distribution(),
+        'word_clouds': aggregator.word_clouds()
+    }
+
+def empty_column(keep_results=True):
+    """Results for a column that had no rows to analyze"""
+    return summarize_column(SentimentAggregator(), {key: [] for key in RESULT_KEYS} if keep_results else None)
+
+def split_columns(columns, baseline_results, rag_results, explanations):
+    """Split flattened results back into {column: per-row results} for [(column, texts)]"""
+    split = {}
+    start = 0
+    for column, column_texts in columns:
+        end = start + len(column_texts)
+        split[column] = {
+            'baseline_sentiment': baseline_results[start:end],
+            'rag_sentiment': rag_results[start:end],
+            'explanations': explanations[start:end]
+        }
+        start = end
+    return split
+
+def analyze_shard(analyzer, columns, deadline=None):
+    """Score, explain and partially aggregate [(column, texts)], e.g. inside a pool worker"""
+    texts = [text for _, column_texts in columns for text in column_texts]
+    with track_stats() as cache_stats:
+        predictions, contexts, groups = score_groups(analyzer, texts)
+        baseline_results = analyzer.baseline_sentiment_analysis(texts, predictions)
+        rag_results = analyzer.rag_sentiment_analysis(texts, predictions, contexts)
+        explanations = analyzer.generate_explanations(texts, rag_results, deadline)
+    
+    results = split_columns(columns, baseline_results, rag_results, explanations)
+    aggregators = {}
+    for column, column_texts in columns:
+        aggregator = aggregators.setdefault(column, SentimentAggregator())
+        aggregator.add(column_texts, results[column]['baseline_sentiment'], results[column]['rag_sentiment'])
+    return {'columns': results, 'aggregators': aggregators, 'groups': groups, 'cache': cache_stats}
+
+def analyze_column_chunks(analyzer, chunks, keep_results=True, on_chunk=None, progress_callback=None,
+                          attribution_deadline=None):
+    """Score, explain and aggregate {'rows', 'texts': {column: texts}} chunks through the pipelined scheduler
+    
+    attribution_deadline bounds the attributions of all chunks together, as from analyzer.attribution_deadline().
+    """
+    aggregators = {}
+    per_row = {}
+    meter = ThroughputMeter()
+    dedup = DedupCounter()
+    
+    # Started before the stage threads so the workers are forked from a quiet process
+    pool = analyzer.worker_pool
+    
+    def infer(chunk):
+        if pool is not None:
+            # Each worker scores, explains and aggregates one shard of the chunk
+            return chunk, pool.analyze(chunk['texts'], attribution_deadline)
+        
+        # Duplicates within or across columns collapse to one scored representative
+        texts = [text for column_texts in chunk['texts'].values() for text in column_texts]
+        predictions, contexts, groups = score_groups(analyzer, texts)
+        baseline_results = analyzer.baseline_sentiment_analysis(texts, predictions)
+        rag_results = analyzer.rag_sentiment_analysis(texts, predictions, contexts)
+        return chunk, (texts, baseline_results, rag_results, groups)
+    
+    def merge_shards(shards):
+        # Results come back from the workers without passages; context ids resolve against ours
+        passages = analyzer.rag_knowledge_base.passages
+        parts = {}
+        for shard in shards:
+            dedup.add(shard['groups'])
+            # Cache traffic of the worker processes counts towards this run
+            merge_stats(shard['cache'])
+            for column, column_results in shard['columns'].items():
+                column_parts = parts.setdefault(column, {key: [] for key in RESULT_KEYS})
+                for key, values in column_results.items():
+                    if isinstance(values, ColumnarResults):
+                        values.passages = passages
+                    column_parts[key].append(values)
+                aggregators.setdefault(column, SentimentAggregator()).merge(shard['aggregators'][column])
+        return {
+            column: {key: concat_rows(values) for key, values in column_parts.items()}
+            for column, column_parts in parts.items()
+        }
+    
+    def aggregate_in_process(chunk, texts, baseline_results, rag_results, groups):
+        explanations = analyzer.generate_explanations(texts, rag_results, attribution_deadline)
+        dedup.add(groups)
+        
+        chunk_results = split_columns(chunk['texts'].items(), baseline_results, rag_results, explanations)
+        for column, column_texts in chunk['texts'].items():
+            column_results = chunk_results[column]
+            aggregator = aggregators.setdefault(column, SentimentAggregator())
+            aggregator.add(column_texts, column_results['baseline_sentiment'], column_results['rag_sentiment'])
+        return chunk_results
+    
+    def aggregate(inferred):
+        chunk, outputs = inferred
+        chunk_results = merge_shards(outputs) if pool is not None else aggregate_in_process(chunk, *outputs)
+        
+        if keep_results:
+            # Chunks are kept as they are and concatenated once at the end
+            for column, column_results in chunk_results.items():
+                column_rows = per_row.setdefault(column, {key: [] for key in column_results})
+                for key, values in column_results.items():
+                    column_rows[key].append(values)
+        
+        if on_chunk is not None:
+            on_chunk(chunk_results)
+        
+        meter.add(chunk['rows'])
+        print(f"[v0] Processed {meter.rows} rows ({meter.rows_per_second:.1f} rows/s)")
+        if progress_callback is not None:
+            progress_callback(meter.report())
+    
+    run_pipeline(chunks, infer, aggregate)
+    
+    rows = {
+        column: {key: concat_rows(parts) for key, parts in column_parts.items()}
+        for column, column_parts in per_row.items()
+    }
+    return {
+        'columns': {
+            column: summarize_column(aggregator, rows.get(column))
+            for column, aggregator in aggregators.items()
+        },
+        'throughput': meter.report(),
+        'dedup': dedup.report()
+    }
@@ -0,0 +1,250 @@
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .embedding_backends import pack_embedding, unpack_embedding
+from .sentiment_engine import is_blank
+
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Keys per SQL statement, well under SQLite's bound-parameter limit
+QUERY_CHUNK_SIZE = 500
+
+# Hit/miss counts of the run in progress, see track_stats()
+_run_stats = contextvars.ContextVar('result_cache_run_stats', default=None)
+_run_stats_lock = threading.Lock()
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different copies share a cache entry"""
+    return ' '.join(text.split())
+
+def cache_key(kind, model_id, revision, text):
+    """Content address for one model output"""
+    digest = hashlib.sha256()
+    for part in (kind, model_id, revision or '', normalize_text(text)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def encode_value(kind, value):
+    if kind.startswith('embedding'):
+        # 'embedding' is float32; 'embedding:float16' and 'embedding:int8' are stored compressed
+        return pack_embedding(value, kind.partition(':')[2] or 'float32')
+    return json.dumps(value).encode('utf-8')
+
+def decode_value(kind, blob):
+    if kind.startswith('embedding'):
+        return unpack_embedding(blob, kind.partition(':')[2] or 'float32')
+    return json.loads(blob.decode('utf-8'))
+
+def add_counts(stats, kind, hits, misses):
+    counts = stats.setdefault(kind, {'hits': 0, 'misses': 0})
+    counts['hits'] += hits
+    counts['misses'] += misses
+
+@contextlib.contextmanager
+def track_stats():
+    """Collect {kind: {'hits', 'misses'}} for the cache calls of one run
+    
+    Counts follow the current context, so concurrent runs sharing an analyzer each
+    see only their own calls; threads started for the run need a copy of the context.
+    """
+    stats = {}
+    token = _run_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _run_stats.reset(token)
+
+def merge_stats(stats):
+    """Add counts collected elsewhere, e.g. in a worker process, to the run in progress"""
+    run_stats = _run_stats.get()
+    if run_stats is None:
+        return
+    with _run_stats_lock:
+        for kind, counts in stats.items():
+            add_counts(run_stats, kind, counts['hits'], counts['misses'])
+
+class ResultCache:
+    """Size-bounded LRU cache of sentiment labels/scores and embeddings in SQLite"""
+    
+    def __init__(self, path, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = {}
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        
+        with self._transaction() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, kind TEXT NOT NULL, value BLOB NOT NULL, '
+                'size INTEGER NOT NULL, accessed REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+            # Running total of entry sizes, so eviction doesn't sum the whole table on every write
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            conn.execute(
+                "INSERT OR IGNORE INTO meta (name, value) SELECT 'total_size', COALESCE(SUM(size), 0) FROM entries"
+            )
+    
+    def _connection(self):
+        """One connection per thread; WAL lets several worker processes share the file"""
+        conn = getattr(self._local, 'conn', None)
+        # A forked worker inherits the parent's thread-local connection but must not use it
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database lock up front to avoid upgrade deadlocks"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+    
+    def _count(self, kind, hits, misses):
+        with self._stats_lock:
+            add_counts(self.stats, kind, hits, misses)
+        merge_stats({kind: {'hits': hits, 'misses': misses}})
+    
+    def snapshot(self):
+        """Copy of the hit/miss counters since this cache was opened, across all runs"""
+        with self._stats_lock:
+            return {kind: dict(counts) for kind, counts in self.stats.items()}
+    
+    def get_many(self, kind, model_id, revision, texts):
+        """Look up cached values, returning None for every miss"""
+        keys = [cache_key(kind, model_id, revision, text) for text in texts]
+        found = {}
+        conn = self._connection()
+        
+        for start in range(0, len(keys), QUERY_CHUNK_SIZE):
+            chunk = keys[start:start + QUERY_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(
+                f'SELECT key, value FROM entries WHERE key IN ({placeholders})', chunk
+            ).fetchall()
+            found.update(rows)
+        
+        # Refresh recency so eviction keeps the entries still being read
+        if found:
+            now = time.time()
+            with self._transaction() as conn:
+                conn.executemany(
+                    'UPDATE entries SET accessed = ? WHERE key = ?',
+                    [(now, key) for key in found]
+                )
+        
+        values = [decode_value(kind, found[key]) if key in found else None for key in keys]
+        hits = sum(1 for key in keys if key in found)
+        self._count(kind, hits, len(keys) - hits)
+        return values
+    
+    def put_many(self, kind, model_id, revision, texts, values):
+        """Store values for texts and evict least recently used entries past max_bytes"""
+        now = time.time()
+        rows = []
+        for text, value in zip(texts, values):
+            blob = encode_value(kind, value)
+            rows.append((cache_key(kind, model_id, revision, text), kind, blob, len(blob), now))
+        
+        if not rows:
+            return
+        
+        with self._transaction() as conn:
+            # Entries being replaced no longer count towards the total
+            keys = [row[0] for row in rows]
+            replaced = 0
+            for start in range(0, len(keys), QUERY_CHUNK_SIZE):
+                chunk = keys[start:start + QUERY_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                replaced += conn.execute(
+                    f'SELECT COALESCE(SUM(size), 0) FROM entries WHERE key IN ({placeholders})', chunk
+                ).fetchone()[0]
+            
+            conn.executemany(
+                'INSERT OR REPLACE INTO entries (key, kind, value, size, accessed) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            self._add_size(conn, sum(row[3] for row in rows) - replaced)
+            self._evict(conn)
+    
+    @staticmethod
+    def _add_size(conn, delta):
+        conn.execute("UPDATE meta SET value = value + ? WHERE name = 'total_size'", (delta,))
+    
+    def evict(self):
+        """Delete the least recently used entries until the cache fits in max_bytes"""
+        with self._transaction() as conn:
+            self._evict(conn)
+    
+    def _evict(self, conn):
+        total = conn.execute("SELECT value FROM meta WHERE name = 'total_size'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        excess = total - self.max_bytes
+        doomed = []
+        freed = 0
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY accessed'):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        
+        conn.executemany('DELETE FROM entries WHERE key = ?', doomed)
+        self._add_size(conn, -freed)
+    
+    def cached(self, kind, model_id, revision, texts, compute):
+        """Return one value per text, running compute only on the cache misses"""
+        texts = list(texts)
+        values = [None] * len(texts)
+        
+        # Blank rows never reach the model, so they are neither looked up nor stored
+        valid_indices = [i for i, text in enumerate(texts) if not is_blank(text)]
+        found = self.get_many(kind, model_id, revision, [texts[i] for i in valid_indices])
+        for i, value in zip(valid_indices, found):
+            values[i] = value
+        missing = [i for i in valid_indices if values[i] is None]
+        
+        if missing:
+            # Repeated texts within one call are computed and stored once
+            unique = {}
+            for i in missing:
+                unique.setdefault(normalize_text(texts[i]), []).append(i)
+            representatives = [rows[0] for rows in unique.values()]
+            computed = compute([texts[i] for i in representatives])
+            
+            for rows, value in zip(unique.values(), computed):
+                for i in rows:
+                    values[i] = value
+            
+            # Failed rows come back as None and are retried next time instead of cached
+            stored = [(texts[i], values[i]) for i in representatives if values[i] is not None]
+            self.put_many(kind, model_id, revision, [text for text, _ in stored], [value for _, value in stored])
+        
+        return values
+    
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,100 @@
+from .embedding_backends import DEFAULT_EMBEDDING_STORAGE, DEFAULT_SENTENCE_BACKEND, embedding_cache_kind
+from .model_registry import SENTENCE_MODEL, model_revision
+from .sentiment_backends import backend_model_id
+
+# Texts embedded and searched per FAISS query
+DEFAULT_RETRIEVAL_BATCH_SIZE = 1024
+
+# Texts per forward pass inside sentence_model.encode
+ENCODE_BATCH_SIZE = 64
+
+def encode_texts(sentence_model, texts):
+    """Embed a list of texts in one call, returning a float32 matrix"""
+    import numpy as np
+    
+    embeddings = sentence_model.encode(texts, batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True)
+    return np.ascontiguousarray(embeddings, dtype='float32')
+
+def retrieve_context(sentence_model, knowledge_base, texts, k=2, batch_size=DEFAULT_RETRIEVAL_BATCH_SIZE, cache=None,
+                     backend=DEFAULT_SENTENCE_BACKEND, storage=DEFAULT_EMBEDDING_STORAGE, passage_ids=False,
+                     embeddings=None):
+    """Retrieve the k nearest knowledge base passages (or with passage_ids, their ids) for every text
+    
+    embeddings, if given, holds an already computed vector (or None) per text so they aren't encoded again.
+    """
+    import faiss
+    import numpy as np
+    
+    texts = list(texts)
+    contexts = [None] * len(texts)
+    
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        
+        if embeddings is None:
+            batch_embeddings, batch_rows = embed_batch(sentence_model, batch, cache=cache, backend=backend, storage=storage)
+        else:
+            vectors = embeddings[start:start + batch_size]
+            batch_rows = [row for row, vector in enumerate(vectors) if vector is not None]
+            if batch_rows:
+                batch_embeddings = np.vstack([vectors[row] for row in batch_rows]).astype('float32')
+        if not batch_rows:
+            continue
+        
+        # Passages are indexed normalized, so queries are too: inner product is then cosine
+        faiss.normalize_L2(batch_embeddings)
+        
+        # One matrix query per batch against the knowledge base index
+        search = knowledge_base.search_ids if passage_ids else knowledge_base.search
+        batch_contexts = search(batch_embeddings, k)
+        
+        for row, context in zip(batch_rows, batch_contexts):
+            contexts[start + row] = context
+    
+    return contexts
+
+def embed_batch(sentence_model, texts, cache=None, backend=DEFAULT_SENTENCE_BACKEND, storage=DEFAULT_EMBEDDING_STORAGE):
+    """Embed texts, returning the matrix and the rows that were embedded successfully"""
+    import numpy as np
+    
+    if cache is None:
+        try:
+            return encode_texts(sentence_model, texts), list(range(len(texts)))
+        except Exception:
+            # Fall back to one text at a time so a bad row only loses its own context
+            return encode_rows(sentence_model, texts)
+    
+    def compute(missing):
+        vectors = [None] * len(missing)
+        matrix, rows = embed_batch(sentence_model, missing)
+        for position, row in enumerate(rows):
+            vectors[row] = matrix[position]
+        return vectors
+    
+    # Only texts never seen before by this model revision are encoded
+    vectors = cache.cached(
+        embedding_cache_kind(storage), backend_model_id(SENTENCE_MODEL, backend), model_revision(sentence_model),
+        texts, compute
+    )
+    rows = [row for row, vector in enumerate(vectors) if vector is not None]
+    if not rows:
+        return None, rows
+    return np.vstack([vectors[row] for row in rows]), rows
+
+def encode_rows(sentence_model, texts):
+    """Embed texts one by one, skipping the ones the model fails on"""
+    import numpy as np
+    
+    embeddings = []
+    rows = []
+    
+    for row, text in enumerate(texts):
+        try:
+            embeddings.append(encode_texts(sentence_model, [text])[0])
+            rows.append(row)
+        except Exception as e:
+            print(f"[v0] Error processing text: {str(text)[:50]}... Error: {e}")
+    
+    if not embeddings:
+        return None, rows
+    return np.vstack(embeddings), rows
@@ -0,0 +1,82 @@
+from collections import Counter
+import random
+
+DEFAULT_SAMPLE_SIZE = 1000
+
+# Rows retained while sampling, as a multiple of the sample size, however many strata there are
+RESERVOIR_OVERSAMPLE = 4
+
+class StratifiedReservoir:
+    """Single-pass stratified sample with proportional allocation across strata
+    
+    One uniform reservoir of sample_size * oversample rows is shared by all strata, so
+    memory stays bounded even when stratifying on a high-cardinality column; only the
+    per-stratum counts grow with the number of strata. Each stratum's quota is then
+    drawn from its members in the reservoir, which are a uniform sample of the stratum.
+    """
+    
+    def __init__(self, sample_size=DEFAULT_SAMPLE_SIZE, seed=None, oversample=RESERVOIR_OVERSAMPLE):
+        self.sample_size = sample_size
+        self.capacity = sample_size * oversample
+        self.random = random.Random(seed)
+        self.reservoir = []
+        self.seen = Counter()
+        self.total = 0
+    
+    def add(self, item, stratum=None):
+        """Offer one item to the shared reservoir and count it under its stratum"""
+        self.seen[stratum] += 1
+        self.total += 1
+        
+        if len(self.reservoir) < self.capacity:
+            self.reservoir.append((stratum, item))
+            return
+        
+        slot = self.random.randrange(self.total)
+        if slot < self.capacity:
+            self.reservoir[slot] = (stratum, item)
+    
+    def allocation(self):
+        """Items per stratum proportional to stratum size (largest remainder rounding)"""
+        total = sum(self.seen.values())
+        if total <= self.sample_size:
+            return dict(self.seen)
+        
+        exact = {stratum: self.sample_size * count / total for stratum, count in self.seen.items()}
+        quotas = {stratum: int(share) for stratum, share in exact.items()}
+        remaining = self.sample_size - sum(quotas.values())
+        
+        for stratum in sorted(exact, key=lambda s: exact[s] - quotas[s], reverse=True)[:remaining]:
+            quotas[stratum] += 1
+        return quotas
+    
+    def sample(self):
+        members = {}
+        for stratum, item in self.reservoir:
+            members.setdefault(stratum, []).append(item)
+        
+        items = []
+        leftovers = []
+        for stratum, quota in self.allocation().items():
+            candidates = members.get(stratum, [])
+            self.random.shuffle(candidates)
+            items.extend(candidates[:quota])
+            leftovers.extend(candidates[quota:])
+        
+        # Strata with too few retained members leave a shortfall; fill it uniformly from the rest
+        shortfall = min(self.sample_size, self.total) - len(items)
+        if shortfall > 0:
+            items.extend(self.random.sample(leftovers, min(shortfall, len(leftovers))))
+        return items
+
+def sample_rows(chunks, sample_size=DEFAULT_SAMPLE_SIZE, seed=None):
+    """Draw a stratified sample of rows from (rows, strata) chunks in one pass"""
+    reservoir = StratifiedReservoir(sample_size, seed)
+    
+    for rows, strata in chunks:
+        if strata is None:
+            strata = [None] * len(rows)
+        for row, stratum in zip(rows, strata):
+            reservoir.add(row, stratum)
+    
+    return reservoir.sample()
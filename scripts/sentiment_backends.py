@@ -0,0 +1,199 @@
+import json
+import os
+import platform
+import shutil
+
+# 'torch' is the eager fp32 pipeline, 'onnx_int8' runs an ONNX Runtime export with dynamic int8
+# quantization and 'torch_int8' applies torch dynamic quantization to the Linear layers
+SENTIMENT_BACKENDS = ('torch', 'onnx_int8', 'torch_int8')
+DEFAULT_SENTIMENT_BACKEND = 'torch'
+
+# Exported models, tokenizers and parity results are cached here, one directory per model revision and backend
+DEFAULT_ARTIFACT_DIR = os.environ.get(
+    'SENTIMENT_ARTIFACT_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'sentiment-analyzer')
+)
+
+ONNX_MODEL_FILE = 'model_quantized.onnx'
+META_FILE = 'meta.json'
+
+# A quantized backend whose labels agree with eager on fewer of the parity texts is not used
+MIN_PARITY_AGREEMENT = 0.9
+
+PARITY_TEXTS = [
+    "I love this product, it works perfectly!",
+    "This is the worst service I have ever received.",
+    "The package arrived on Tuesday.",
+    "Not bad at all, honestly better than I expected",
+    "I'm so disappointed, it broke after two days",
+    "Meh. It's fine I guess.",
+    "Absolutely fantastic experience, highly recommend 👍",
+    "Terrible customer support, never buying again #fail",
+    "The meeting has been moved to 3pm.",
+    "Great, another delay. Just what I needed...",
+    "@brand thanks for the quick reply, issue solved!",
+    "Prices went up again this month",
+    "What a wonderful day with friends",
+    "I hate waiting in line for hours",
+    "The report covers sales from the last quarter",
+    "Could be better, could be worse",
+]
+
+def check_backend(backend):
+    if backend not in SENTIMENT_BACKENDS:
+        raise ValueError(f"Unsupported sentiment backend: {backend}")
+    return backend
+
+def backend_model_id(model_name, backend):
+    """Cache model id for a backend; quantized scores differ slightly from eager ones"""
+    return model_name if backend == 'torch' else f'{model_name}:{backend}'
+
+def model_config_revision(model_name):
+    """Hub commit hash of the model, read from its config without loading the weights"""
+    from transformers import AutoConfig
+    
+    return getattr(AutoConfig.from_pretrained(model_name), '_commit_hash', None) or 'unknown'
+
+def artifact_dir(model_name, revision, backend, root=DEFAULT_ARTIFACT_DIR):
+    return os.path.join(root, model_name.replace('/', '--'), revision[:12], backend)
+
+def cpu_quantization_target():
+    """Instruction set to tune int8 kernels for: 'arm64', 'avx512_vnni', 'avx512' or 'avx2'"""
+    if platform.machine().lower() in ('arm64', 'aarch64'):
+        return 'arm64'
+    
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as f:
+            flags = f.read()
+    except OSError:
+        flags = ''
+    if 'avx512_vnni' in flags:
+        return 'avx512_vnni'
+    if 'avx512' in flags:
+        return 'avx512'
+    return 'avx2'
+
+def onnx_quantization_config():
+    """Dynamic int8 quantization config matching the CPU instruction set"""
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    
+    configure = getattr(AutoQuantizationConfig, cpu_quantization_target())
+    return configure(is_static=False, per_channel=False)
+
+def export_onnx_int8(model_name, directory):
+    """Export the model to ONNX and write a dynamically int8-quantized copy into directory"""
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from transformers import AutoTokenizer
+    
+    export_dir = os.path.join(directory, 'fp32')
+    model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+    model.save_pretrained(export_dir)
+    
+    quantizer = ORTQuantizer.from_pretrained(export_dir)
+    quantizer.quantize(save_dir=directory, quantization_config=onnx_quantization_config())
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(directory)
+    
+    # Only the quantized graph is needed at inference time
+    shutil.rmtree(export_dir, ignore_errors=True)
+
+def load_onnx_int8(model_name, directory):
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer, pipeline
+    
+    model = ORTModelForSequenceClassification.from_pretrained(
+        directory, file_name=ONNX_MODEL_FILE, provider='CPUExecutionProvider'
+    )
+    return pipeline('sentiment-analysis', model=model, tokenizer=AutoTokenizer.from_pretrained(directory))
+
+def export_torch_int8(model_name, directory):
+    """Only the tokenizer is kept; the weights are quantized from the eager model on every load"""
+    from transformers import AutoTokenizer
+    
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(directory)
+
+def load_torch_int8(model_name, directory):
+    """Eager weights with the Linear layers dynamically quantized to int8
+    
+    Quantizing on load is quick, survives torch upgrades and unpickles nothing from the artifact directory.
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+    
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipeline('sentiment-analysis', model=quantized, tokenizer=AutoTokenizer.from_pretrained(directory))
+
+EXPORTERS = {'onnx_int8': export_onnx_int8, 'torch_int8': export_torch_int8}
+LOADERS = {'onnx_int8': load_onnx_int8, 'torch_int8': load_torch_int8}
+
+def parity_check(candidate, reference, texts=PARITY_TEXTS):
+    """Compare a backend pipeline against the eager one on the same texts"""
+    texts = list(texts)
+    candidate_outputs = candidate(texts, batch_size=len(texts), truncation=True)
+    reference_outputs = reference(texts, batch_size=len(texts), truncation=True)
+    
+    agreeing = [c['label'] == r['label'] for c, r in zip(candidate_outputs, reference_outputs)]
+    score_deltas = [
+        abs(c['score'] - r['score']) for c, r, same in zip(candidate_outputs, reference_outputs, agreeing) if same
+    ]
+    return {
+        'texts': len(texts),
+        'agreement': sum(agreeing) / len(texts) if texts else 1.0,
+        'max_score_delta': max(score_deltas, default=0.0)
+    }
+
+def load_backend_pipeline(backend, model_name, reference=None, root=DEFAULT_ARTIFACT_DIR):
+    """Sentiment pipeline for a non-eager backend, exporting it on first use
+    
+    reference() returns the eager pipeline; it is only loaded to run the parity
+    check when the artifacts are first built. Backends that fail the check (or
+    cannot be built here) fall back to the eager pipeline.
+    """
+    check_backend(backend)
+    
+    revision = model_config_revision(model_name)
+    directory = artifact_dir(model_name, revision, backend, root)
+    meta_path = os.path.join(directory, META_FILE)
+    
+    if not os.path.exists(meta_path):
+        print(f"[v0] Building {backend} artifacts for {model_name} in {directory}...")
+        # Build next to the final location and rename, so concurrent workers never see half an export
+        staging = f'{directory}.{os.getpid()}.tmp'
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        try:
+            EXPORTERS[backend](model_name, staging)
+            parity = parity_check(LOADERS[backend](model_name, staging), reference()) if reference else None
+        except Exception as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            print(f"[v0] Could not build the {backend} backend, using eager PyTorch: {e}")
+            return reference() if reference else None
+        
+        with open(os.path.join(staging, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'model': model_name, 'revision': revision, 'backend': backend, 'parity': parity}, f, indent=2)
+        try:
+            os.rename(staging, directory)
+        except OSError:
+            # Another worker finished first; its artifacts are equivalent
+            shutil.rmtree(staging, ignore_errors=True)
+    
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        
+        parity = meta.get('parity')
+        if parity is not None:
+            print(f"[v0] {backend} parity with eager: {parity['agreement']:.1%} label agreement, "
+                  f"max score delta {parity['max_score_delta']:.4f}")
+            if parity['agreement'] < MIN_PARITY_AGREEMENT and reference:
+                print(f"[v0] {backend} is below {MIN_PARITY_AGREEMENT:.0%} agreement, using eager PyTorch")
+                return reference()
+        
+        sentiment_pipeline = LOADERS[backend](model_name, directory)
+    except Exception as e:
+        # Corrupt artifacts or a runtime that can no longer load them
+        print(f"[v0] Could not load the cached {backend} backend from {directory}, using eager PyTorch: {e}")
+        return reference() if reference else None
+    
+    # Keep cache keys tied to the hub revision the artifacts were built from
+    sentiment_pipeline.model.config._commit_hash = meta['revision']
+    return sentiment_pipeline
@@ -0,0 +1,192 @@
+import copy
+import threading
+
+DEFAULT_BATCH_SIZE = 32
+
+# Fallback when the tokenizer does not declare a usable maximum length
+DEFAULT_MAX_LENGTH = 512
+
+# Inputs at most this share past the model limit are truncated; longer ones are split into windows
+TRUNCATION_TOLERANCE = 0.25
+
+# Tokens shared by consecutive windows of a long text
+WINDOW_OVERLAP = 64
+
+def is_blank(text):
+    """Check whether a row has no text worth sending to the model"""
+    # Covers None, NaN from pandas and empty or whitespace-only strings
+    return not isinstance(text, str) or text.strip() == ''
+
+class SentimentEngine:
+    """Batched inference on top of a transformers sentiment pipeline"""
+    
+    def __init__(self, sentiment_pipeline, batch_size=DEFAULT_BATCH_SIZE, max_length=None,
+                 truncation_tolerance=TRUNCATION_TOLERANCE, window_overlap=WINDOW_OVERLAP):
+        self.sentiment_pipeline = sentiment_pipeline
+        self.batch_size = max(1, int(batch_size))
+        self.max_length = max_length or self.model_max_length(sentiment_pipeline)
+        self.truncation_tolerance = truncation_tolerance
+        self.window_overlap = window_overlap
+        self._measuring_tokenizer = None
+        self._measuring_lock = threading.Lock()
+    
+    @staticmethod
+    def model_max_length(sentiment_pipeline):
+        """Read the maximum input length from the pipeline tokenizer"""
+        tokenizer = getattr(sentiment_pipeline, 'tokenizer', None)
+        max_length = getattr(tokenizer, 'model_max_length', None)
+        
+        # Tokenizers without a configured limit report a very large sentinel
+        if not max_length or max_length > 100000:
+            return DEFAULT_MAX_LENGTH
+        return max_length
+    
+    @property
+    def tokenizer(self):
+        """The pipeline's fast tokenizer, or None when only a slow one (or none) is available"""
+        tokenizer = getattr(self.sentiment_pipeline, 'tokenizer', None)
+        return tokenizer if getattr(tokenizer, 'is_fast', False) else None
+    
+    def token_offsets(self, texts):
+        """Character span of every token per text from one bulk tokenizer call, or None without a fast tokenizer"""
+        tokenizer = self.tokenizer
+        if tokenizer is None or not texts:
+            return None
+        
+        # A fast tokenizer can't switch truncation settings while another thread is encoding with it
+        # ("Already borrowed"), so measuring uses this engine's own copy rather than the pipeline's
+        with self._measuring_lock:
+            if self._measuring_tokenizer is None:
+                self._measuring_tokenizer = copy.deepcopy(tokenizer)
+            encoded = self._measuring_tokenizer(
+                texts, add_special_tokens=False, truncation=False, return_offsets_mapping=True, verbose=False
+            )
+        return encoded['offset_mapping']
+    
+    def split_windows(self, text, offsets, window):
+        """Overlapping (window text, token count) pairs of at most `window` tokens covering the whole text"""
+        stride = max(1, window - min(self.window_overlap, window // 2))
+        windows = []
+        start = 0
+        while True:
+            end = min(start + window, len(offsets))
+            windows.append((text[offsets[start][0]:offsets[end - 1][1]], end - start))
+            if end == len(offsets):
+                return windows
+            start += stride
+    
+    def prepare(self, texts):
+        """Model inputs with their owning row and token count
+        
+        Texts that fit, or overflow the model limit by at most truncation_tolerance,
+        are one input each (the pipeline truncates the overflow); longer texts are
+        split into overlapping windows whose scores are combined afterwards.
+        """
+        offsets = self.token_offsets(texts)
+        if offsets is None:
+            return texts, list(range(len(texts))), [len(text) for text in texts]
+        
+        window = self.max_length - self.tokenizer.num_special_tokens_to_add()
+        inputs, owners, lengths = [], [], []
+        for i, (text, text_offsets) in enumerate(zip(texts, offsets)):
+            if len(text_offsets) <= window * (1 + self.truncation_tolerance):
+                inputs.append(text)
+                owners.append(i)
+                lengths.append(min(len(text_offsets), window))
+                continue
+            
+            for window_text, tokens in self.split_windows(text, text_offsets, window):
+                inputs.append(window_text)
+                owners.append(i)
+                lengths.append(tokens)
+        return inputs, owners, lengths
+    
+    def iter_batches(self, texts, lengths=None):
+        """Yield (indices, texts) batches bucketed by token length (text length if not given)"""
+        # Sorting by length groups similar-sized inputs so padding stays small
+        lengths = lengths or [len(text) for text in texts]
+        order = sorted(range(len(texts)), key=lambda i: lengths[i])
+        
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            yield indices, [texts[i] for i in indices]
+    
+    def combine_windows(self, outputs, weights):
+        """One prediction from window predictions, weighting each window by its token count
+        
+        A window's score goes to its label and the remainder is spread over the
+        model's other labels, so for binary models this averages the class probability.
+        """
+        scored = [(output, weight) for output, weight in zip(outputs, weights) if output is not None]
+        if not scored:
+            return None
+        
+        config = getattr(getattr(self.sentiment_pipeline, 'model', None), 'config', None)
+        labels = list(getattr(config, 'id2label', {}).values()) or list({output['label'] for output, _ in scored})
+        
+        mass = dict.fromkeys(labels, 0.0)
+        for output, weight in scored:
+            others = [label for label in labels if label != output['label']]
+            mass[output['label']] = mass.get(output['label'], 0.0) + output['score'] * weight
+            for label in others:
+                mass[label] += (1 - output['score']) * weight / len(others)
+        
+        label = max(mass, key=mass.get)
+        return {'label': label, 'score': mass[label] / sum(weight for _, weight in scored)}
+    
+    def predict(self, texts):
+        """Score texts in batches, returning one {'label', 'score'} dict per text"""
+        # Rows that fail even when scored on their own come back as None so the
+        # caller can apply its fallback without losing the rest of the batch
+        texts = list(texts)
+        inputs, owners, lengths = self.prepare(texts)
+        outputs = [None] * len(inputs)
+        
+        for indices, batch in self.iter_batches(inputs, lengths):
+            try:
+                batch_outputs = self.sentiment_pipeline(
+                    batch,
+                    batch_size=len(batch),
+                    truncation=True,
+                    max_length=self.max_length
+                )
+            except Exception:
+                # Isolate the failing row(s) by retrying the batch one text at a time
+                batch_outputs = [self.predict_one(text) for text in batch]
+            
+            for index, output in zip(indices, batch_outputs):
+                outputs[index] = output
+        
+        if len(inputs) == len(texts):
+            return outputs
+        
+        # Fold the windows of long texts back into one prediction per row
+        windows = [([], []) for _ in texts]
+        for owner, output, length in zip(owners, outputs, lengths):
+            windows[owner][0].append(output)
+            windows[owner][1].append(length)
+        return [
+            row_outputs[0] if len(row_outputs) == 1 else self.combine_windows(row_outputs, weights)
+            for row_outputs, weights in windows
+        ]
+    
+    def score(self, texts):
+        """Score each non-empty text once, returning None for blank or failed rows"""
+        texts = list(texts)
+        predictions = [None] * len(texts)
+        
+        valid_indices = [i for i, text in enumerate(texts) if not is_blank(text)]
+        valid_predictions = self.predict([texts[i] for i in valid_indices])
+        
+        for i, prediction in zip(valid_indices, valid_predictions):
+            predictions[i] = prediction
+        
+        return predictions
+    
+    def predict_one(self, text):
+        """Score a single text, returning None if the model fails on it"""
+        try:
+            return self.sentiment_pipeline(text, truncation=True, max_length=self.max_length)[0]
+        except Exception as e:
+            print(f"[v0] Error processing text: {str(text)[:50]}... Error: {e}")
+            return None
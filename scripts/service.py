@@ -0,0 +1,389 @@
+# Usage: python -m scripts.service [--host 127.0.0.1] [--port 8765] [--workers 2] [--queue-size 16]
+#
+#   POST /jobs/dataset?filename=data.csv[&mode=sample&text_columns=a,b]   body: the file
+#   POST /jobs/tweets?filename=tweets.pdf[&analyze=0]                    body: a .pdf/.docx file
+#   POST /jobs/tweets                         body: {"tweets": [{"tweet_number", "tweet_text"}]}
+#   GET  /jobs/<id>                           poll a job; 'result' is included once it is done
+#   GET  /health
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from urllib.parse import parse_qs, urlsplit
+
+from . import model_registry
+from .embedding_backends import DEFAULT_SENTENCE_BACKEND, SENTENCE_BACKENDS
+from .enhanced_dataset_analyzer import EnhancedDatasetAnalyzer
+from .ingest import file_extension, frame_records
+from .pdf_tweet_extractor import PDFTweetExtractor
+from .sentiment_backends import DEFAULT_SENTIMENT_BACKEND, SENTIMENT_BACKENDS
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Jobs analyzed at once; each runs on an executor thread sharing the loaded models
+DEFAULT_WORKERS = 2
+
+# Jobs waiting beyond this are refused with 503 instead of piling up
+DEFAULT_QUEUE_SIZE = 16
+RETRY_AFTER_SECONDS = 5
+
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+
+# Finished jobs are kept this long for polling
+JOB_TTL_SECONDS = 3600
+
+HTTP_REASONS = {
+    200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'
+}
+
+def to_jsonable(value):
+    """json.dumps fallback for the DataFrames, numpy values and columnar results analyzers return"""
+    if hasattr(value, 'to_dicts'):
+        return value.to_dicts()
+    if hasattr(value, 'to_dict'):
+        return frame_records(value)
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+class Job:
+    def __init__(self, kind, run, cleanup=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.run = run
+        self.cleanup = cleanup
+        self.status = 'queued'
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+    
+    def to_dict(self):
+        job = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished
+        }
+        if self.error is not None:
+            job['error'] = self.error
+        return job
+
+class AnalysisService:
+    """Local HTTP front end that queues analysis jobs onto a fixed pool of executor threads
+    
+    Models are loaded once at startup through the shared registry, so concurrent
+    uploads only pay for inference.
+    """
+    
+    def __init__(self, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE, upload_dir=None, **analyzer_options):
+        self.workers = max(1, int(workers))
+        self.queue_size = queue_size
+        self.upload_dir = upload_dir or tempfile.gettempdir()
+        self.dataset_analyzer = EnhancedDatasetAnalyzer(**analyzer_options)
+        self.tweet_extractor = PDFTweetExtractor(**analyzer_options)
+        self.jobs = {}
+        self.queue = None
+        self.executor = None
+        self.server = None
+        self.ready = False
+    
+    def warmup(self):
+        analyzer = self.dataset_analyzer
+        model_registry.warmup(
+            sentiment_backend=analyzer.sentiment_backend,
+            sentence_backend=analyzer.sentence_backend
+        )
+        # The knowledge base index is built (or loaded) now rather than by the first request
+        analyzer.setup_knowledge_base()
+        self.tweet_extractor.setup_knowledge_base()
+    
+    def start_worker_pools(self):
+        """Fork the inference workers, if enabled, with the models loaded
+        
+        Call this from the main thread before the event loop starts: forking once the
+        executor and micro-batcher threads exist could copy a lock one of them holds.
+        """
+        self.dataset_analyzer.worker_pool
+        self.tweet_extractor.worker_pool
+    
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        from concurrent.futures import ThreadPoolExecutor
+        
+        loop = asyncio.get_running_loop()
+        self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='analysis')
+        self.queue = asyncio.Queue(self.queue_size)
+        
+        # Accept connections right away; jobs queue up until the models are loaded
+        self.server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        print(f"[v0] Analysis service listening on http://{host}:{port}")
+        
+        await loop.run_in_executor(self.executor, self.warmup)
+        self.ready = True
+        print("[v0] Models loaded, accepting jobs")
+        
+        for _ in range(self.workers):
+            loop.create_task(self.worker())
+    
+    async def serve_forever(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        await self.start(host, port)
+        async with self.server:
+            await self.server.serve_forever()
+    
+    async def worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            job.status = 'running'
+            job.started = time.time()
+            try:
+                job.result = await loop.run_in_executor(self.executor, self.execute, job)
+                job.status = 'done'
+            except Exception as e:
+                print(f"[v0] Job {job.id} failed: {e}")
+                job.error = str(e)
+                job.status = 'failed'
+            finally:
+                job.finished = time.time()
+                self.queue.task_done()
+                self.expire_jobs()
+    
+    @staticmethod
+    def execute(job):
+        """Run a job and serialize its result on the executor thread, off the event loop"""
+        try:
+            # allow_nan=False: a stray NaN fails the job here instead of producing JSON browsers reject
+            return json.dumps(job.run(), default=to_jsonable, allow_nan=False).encode('utf-8')
+        finally:
+            if job.cleanup:
+                job.cleanup()
+    
+    def expire_jobs(self):
+        cutoff = time.time() - JOB_TTL_SECONDS
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished and job.finished < cutoff]:
+            del self.jobs[job_id]
+    
+    def submit(self, job):
+        """Queue a job, or return False when the queue is full"""
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            if job.cleanup:
+                job.cleanup()
+            return False
+        self.jobs[job.id] = job
+        return True
+    
+    async def save_upload(self, filename, body):
+        """Write an upload to a temporary file off the event loop, returning its path and cleanup"""
+        loop = asyncio.get_running_loop()
+        # The default executor, so a large write doesn't wait behind running analysis jobs
+        return await loop.run_in_executor(None, self.write_upload, filename, body)
+    
+    def write_upload(self, filename, body):
+        extension = file_extension(filename) if filename else ''
+        fd, path = tempfile.mkstemp(suffix=f'.{extension}' if extension else '', dir=self.upload_dir)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(body)
+        
+        def cleanup():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        
+        return path, cleanup
+    
+    async def dataset_job(self, query, body):
+        filename = query.get('filename')
+        if not filename:
+            raise ValueError("filename query parameter is required")
+        
+        path, cleanup = await self.save_upload(filename, body)
+        mode = query.get('mode', 'full')
+        text_columns = query['text_columns'].split(',') if query.get('text_columns') else None
+        
+        def run():
+            return self.dataset_analyzer.analyze_dataset(path, mode=mode, text_columns=text_columns)
+        
+        return Job('dataset', run, cleanup)
+    
+    async def tweets_job(self, query, body, content_type):
+        extractor = self.tweet_extractor
+        analyze = query.get('analyze', '1') not in ('0', 'false')
+        
+        if content_type.startswith('application/json'):
+            payload = json.loads(body or b'{}')
+            tweets = payload.get('tweets') or [
+                {'tweet_number': i + 1, 'tweet_text': text} for i, text in enumerate(payload.get('texts', []))
+            ]
+            return Job('tweets', lambda: extractor.analyze_tweets(tweets) if analyze else {'tweets': tweets})
+        
+        filename = query.get('filename', '')
+        extension = file_extension(filename)
+        if extension not in ('pdf', 'docx'):
+            raise ValueError("Upload a .pdf or .docx file, or post JSON with 'tweets'")
+        path, cleanup = await self.save_upload(filename, body)
+        
+        def run():
+            if extension == 'pdf':
+                tweets = extractor.extract_numbered_tweets_from_pdf(path)
+            else:
+                tweets = extractor.extract_numbered_tweets_from_docx(path)
+            if not analyze:
+                return {'tweets': tweets}
+            return extractor.analyze_tweets(tweets) or {'tweets': tweets}
+        
+        return Job('tweets', run, cleanup)
+    
+    @staticmethod
+    def queue_full():
+        return 503, {'error': 'Analysis queue is full, retry later'}, {'Retry-After': str(RETRY_AFTER_SECONDS)}
+    
+    @staticmethod
+    def is_job_submission(method, target):
+        parts = [part for part in urlsplit(target).path.split('/') if part]
+        return method == 'POST' and len(parts) == 2 and parts[0] == 'jobs' and parts[1] in ('dataset', 'tweets')
+    
+    async def route(self, method, target, headers, body):
+        """(status, payload bytes or dict, extra headers) for one request"""
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split('/') if part]
+        
+        if parts == ['health']:
+            return 200, {
+                'status': 'ready' if self.ready else 'loading',
+                'queued': self.queue.qsize(),
+                'queue_size': self.queue_size,
+                'workers': self.workers,
+                'models_loaded': len(model_registry.loaded_models()),
+                'micro_batching': self.dataset_analyzer.micro_batching_metrics() if self.ready else None
+            }, {}
+        
+        if len(parts) == 2 and parts[0] == 'jobs' and parts[1] in ('dataset', 'tweets'):
+            if method != 'POST':
+                return 405, {'error': 'Use POST to submit a job'}, {}
+            
+            try:
+                if parts[1] == 'dataset':
+                    job = await self.dataset_job(query, body)
+                else:
+                    job = await self.tweets_job(query, body, headers.get('content-type', ''))
+            except ValueError as e:
+                return 400, {'error': str(e)}, {}
+            
+            if not self.submit(job):
+                return self.queue_full()
+            return 202, {**job.to_dict(), 'poll': f'/jobs/{job.id}'}, {}
+        
+        if len(parts) == 2 and parts[0] == 'jobs':
+            job = self.jobs.get(parts[1])
+            if job is None:
+                return 404, {'error': 'Unknown or expired job'}, {}
+            if job.status != 'done':
+                return 200, job.to_dict(), {}
+            
+            # The result is already JSON; splice it in without decoding it again
+            status = json.dumps(job.to_dict()).encode('utf-8')
+            return 200, status[:-1] + b', "result": ' + job.result + b'}', {}
+        
+        return 404, {'error': 'Not found'}, {}
+    
+    async def handle_connection(self, reader, writer):
+        try:
+            status, payload, extra_headers = await self.handle_request(reader)
+        except Exception as e:
+            print(f"[v0] Request failed: {e}")
+            status, payload, extra_headers = 500, {'error': 'Internal server error'}, {}
+        
+        if isinstance(payload, dict):
+            payload = json.dumps(payload).encode('utf-8')
+        
+        head = [
+            f'HTTP/1.1 {status} {HTTP_REASONS.get(status, "")}',
+            'Content-Type: application/json',
+            f'Content-Length: {len(payload)}',
+            'Connection: close',
+            *(f'{name}: {value}' for name, value in extra_headers.items())
+        ]
+        try:
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + payload)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    async def handle_request(self, reader):
+        try:
+            raw = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            return 400, {'error': 'Malformed request'}, {}
+        
+        request_line, *header_lines = raw.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = request_line.split(' ', 2)
+        except ValueError:
+            return 400, {'error': 'Malformed request line'}, {}
+        
+        headers = {}
+        for line in header_lines:
+            name, sep, value = line.partition(':')
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        
+        length = int(headers.get('content-length') or 0)
+        if length > MAX_UPLOAD_BYTES:
+            return 413, {'error': f'Uploads are limited to {MAX_UPLOAD_BYTES // 2 ** 20} MB'}, {}
+        
+        # Refuse before reading the upload; submit() still checks again once the job is built
+        if self.queue.full() and self.is_job_submission(method.upper(), target):
+            return self.queue_full()
+        body = await reader.readexactly(length) if length else b''
+        
+        return await self.route(method.upper(), target, headers, body)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve dataset and tweet analysis over HTTP with queued jobs')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE)
+    parser.add_argument('--cache-path', help='SQLite result cache shared with other runs')
+    parser.add_argument('--knowledge-base', help='knowledge base directory built by scripts.knowledge_base')
+    parser.add_argument('--sentiment-backend', default=DEFAULT_SENTIMENT_BACKEND, choices=SENTIMENT_BACKENDS)
+    parser.add_argument('--sentence-backend', default=DEFAULT_SENTENCE_BACKEND, choices=SENTENCE_BACKENDS)
+    parser.add_argument('--micro-batch-ms', type=float, help='coalesce model calls across concurrent jobs for up to this long')
+    parser.add_argument('--inference-workers', type=int, help='shard dataset inference across this many processes')
+    args = parser.parse_args(argv)
+    
+    service = AnalysisService(
+        args.workers,
+        args.queue_size,
+        cache_path=args.cache_path,
+        knowledge_base_path=args.knowledge_base,
+        sentiment_backend=args.sentiment_backend,
+        sentence_backend=args.sentence_backend,
+        micro_batch_wait_ms=args.micro_batch_ms,
+        inference_workers=args.inference_workers
+    )
+    try:
+        service.start_worker_pools()
+        asyncio.run(service.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
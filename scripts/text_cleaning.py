@@ -0,0 +1,37 @@
+import re
+
+# Punctuation kept by the dataset analyzer; everything else outside \w becomes a space
+TWEET_PUNCTUATION = r""".!?,;:'"\-$"""
+
+# PDF/DOCX exports keep a wider set of symbols (mentions, hashtags, URLs, code)
+DOCUMENT_PUNCTUATION = TWEET_PUNCTUATION + r"""@#%&*+=\[\]{}|\\<>/~`"""
+
+# Tweet numbers like "1.", "2." at the start of a (stripped) line
+TWEET_START = re.compile(r'^\s*(\d+)\.\s*(.*)$')
+
+# The same, matched line by line across a whole document in one scan
+TWEET_LINE = re.compile(r'^[^\S\n]*(\d+)\.[^\S\n]*(.*)$', re.MULTILINE)
+
+LINE_BREAK = re.compile(r'\r\n|\r|\n')
+
+class TextCleaner:
+    """Whitespace normalization and artifact stripping in a single regex pass
+    
+    Any run of whitespace and disallowed characters collapses to one space, which
+    is what split/join followed by two substitutions used to do in three passes.
+    """
+    
+    def __init__(self, punctuation):
+        self.pattern = re.compile(rf'[^\w{punctuation}]+')
+    
+    def clean(self, text):
+        if not text:
+            return ""
+        return self.pattern.sub(' ', text).strip()
+    
+    def clean_series(self, series):
+        """Clean every string of a pandas Series at once; missing values stay missing"""
+        return series.str.replace(self.pattern, ' ', regex=True).str.strip()
+
+tweet_cleaner = TextCleaner(TWEET_PUNCTUATION)
+document_cleaner = TextCleaner(DOCUMENT_PUNCTUATION)
@@ -0,0 +1,166 @@
+from collections import Counter
+import heapq
+import zlib
+
+# 'exact' keeps every token, 'space_saving' and 'count_min' bound memory by capacity
+COUNTER_MODES = ('exact', 'space_saving', 'count_min')
+DEFAULT_COUNTER_MODE = 'space_saving'
+
+# Tokens tracked per counter; counts are exact while the vocabulary stays below this
+DEFAULT_COUNTER_CAPACITY = 50000
+
+DEFAULT_SKETCH_WIDTH = 1 << 16
+DEFAULT_SKETCH_DEPTH = 4
+
+SKETCH_PRIME = (1 << 31) - 1
+
+def make_counter(mode=DEFAULT_COUNTER_MODE, capacity=DEFAULT_COUNTER_CAPACITY):
+    if mode == 'exact':
+        return ExactCounter()
+    if mode == 'space_saving':
+        return SpaceSavingCounter(capacity)
+    if mode == 'count_min':
+        return CountMinCounter(capacity)
+    raise ValueError(f"Unsupported counter mode: {mode}")
+
+class ExactCounter(Counter):
+    """Unbounded counts with the same update/merge/most_common interface as the sketches"""
+    
+    def merge(self, other):
+        self.update(other.counts())
+        return self
+    
+    def counts(self):
+        return self
+
+class SpaceSavingCounter:
+    """Batched Space-Saving summary keeping at most 2 * capacity tokens
+    
+    A token first seen after others were evicted starts at the largest evicted
+    count, so counts may overestimate by at most `floor` but never miss a heavy hitter.
+    """
+    
+    def __init__(self, capacity=DEFAULT_COUNTER_CAPACITY):
+        self.capacity = capacity
+        self.floor = 0
+        self._counts = {}
+    
+    def __len__(self):
+        return len(self._counts)
+    
+    def update(self, tokens):
+        batch = tokens if isinstance(tokens, Counter) else Counter(tokens)
+        counts = self._counts
+        floor = self.floor
+        for token, count in batch.items():
+            counts[token] = counts.get(token, floor) + count
+        
+        # Prune lazily so the sort is amortized over many batches
+        if len(counts) > 2 * self.capacity:
+            self.prune()
+    
+    def prune(self):
+        if len(self._counts) <= self.capacity:
+            return
+        kept = heapq.nlargest(self.capacity + 1, self._counts.items(), key=lambda item: item[1])
+        self.floor = max(self.floor, kept[-1][1])
+        self._counts = dict(kept[:-1])
+    
+    def merge(self, other):
+        """Fold in a counter built by another worker"""
+        if isinstance(other, SpaceSavingCounter):
+            # A token missing on one side may have been evicted there, so it gets that side's floor
+            counts = self._counts
+            for token in counts.keys() - other._counts.keys():
+                counts[token] += other.floor
+            for token, count in other._counts.items():
+                counts[token] = counts.get(token, self.floor) + count
+            self.floor += other.floor
+            if len(self._counts) > 2 * self.capacity:
+                self.prune()
+        else:
+            self.update(other.counts())
+        return self
+    
+    def counts(self):
+        return Counter(self._counts)
+    
+    def most_common(self, n=None):
+        if n is None:
+            return sorted(self._counts.items(), key=lambda item: item[1], reverse=True)
+        return heapq.nlargest(n, self._counts.items(), key=lambda item: item[1])
+
+class CountMinCounter:
+    """Count-Min sketch for token frequencies plus a bounded set of top-k candidates"""
+    
+    def __init__(self, capacity=DEFAULT_COUNTER_CAPACITY, width=DEFAULT_SKETCH_WIDTH, depth=DEFAULT_SKETCH_DEPTH, seed=1):
+        import numpy as np
+        
+        rng = np.random.RandomState(seed)
+        self.capacity = capacity
+        self.width = width
+        self.seed = seed
+        self.sketch = np.zeros((depth, width), dtype=np.int64)
+        self._a = rng.randint(1, SKETCH_PRIME, depth).astype(np.uint64)
+        self._b = rng.randint(0, SKETCH_PRIME, depth).astype(np.uint64)
+        self._candidates = {}
+    
+    def __len__(self):
+        return len(self._candidates)
+    
+    def _columns(self, tokens):
+        import numpy as np
+        
+        hashes = np.fromiter((zlib.crc32(token.encode('utf-8')) for token in tokens), dtype=np.uint64, count=len(tokens))
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % SKETCH_PRIME) % self.width
+    
+    def estimate(self, tokens):
+        """Upper-bound frequency estimates for a list of tokens"""
+        import numpy as np
+        
+        if not tokens:
+            return []
+        columns = self._columns(tokens)
+        return self.sketch[np.arange(len(self.sketch))[:, None], columns].min(axis=0).tolist()
+    
+    def update(self, tokens):
+        import numpy as np
+        
+        batch = tokens if isinstance(tokens, Counter) else Counter(tokens)
+        if not batch:
+            return
+        
+        words = list(batch)
+        columns = self._columns(words)
+        increments = np.fromiter(batch.values(), dtype=np.int64, count=len(words))
+        for row in range(len(self.sketch)):
+            np.add.at(self.sketch[row], columns[row], increments)
+        
+        self._track(words)
+    
+    def _track(self, words):
+        for word, estimate in zip(words, self.estimate(words)):
+            self._candidates[word] = estimate
+        if len(self._candidates) > 2 * self.capacity:
+            self._candidates = dict(heapq.nlargest(self.capacity, self._candidates.items(), key=lambda item: item[1]))
+    
+    def merge(self, other):
+        """Add another worker's sketch; both must share width, depth and seed"""
+        if not isinstance(other, CountMinCounter):
+            self.update(other.counts())
+            return self
+        if other.sketch.shape != self.sketch.shape or other.seed != self.seed:
+            raise ValueError("Count-Min sketches must share width, depth and seed to be merged")
+        
+        self.sketch += other.sketch
+        # Candidate estimates are refreshed against the combined sketch
+        self._track(list(self._candidates.keys() | other._candidates.keys()))
+        return self
+    
+    def counts(self):
+        return Counter(self._candidates)
+    
+    def most_common(self, n=None):
+        words = list(self._candidates)
+        ranked = sorted(zip(words, self.estimate(words)), key=lambda item: item[1], reverse=True)
+        return ranked if n is None else ranked[:n]
@@ -0,0 +1,114 @@
+import gc
+import multiprocessing
+import os
+
+# Thread pools that would otherwise each size themselves to every core in every worker
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+# This worker's analyzer, set by _init_worker in the child process
+_analyzer = None
+
+def threads_per_worker(workers):
+    """Intra-op threads for each worker so workers * threads doesn't exceed the cores"""
+    return max(1, (os.cpu_count() or 1) // workers)
+
+def pin_threads(threads):
+    """Limit the numeric libraries of this process to the given number of threads"""
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    os.environ['TOKENIZERS_PARALLELISM'] = 'false'
+    
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    
+    try:
+        import faiss
+        faiss.omp_set_num_threads(threads)
+    except ImportError:
+        pass
+
+def _init_worker(analyzer, threads):
+    global _analyzer
+    
+    pin_threads(threads)
+    # Batcher threads don't survive the fork, and each worker already batches its own shard
+    analyzer.micro_batch_wait_ms = None
+    _analyzer = analyzer
+
+def _analyze_shard(args):
+    from .pipeline import analyze_shard
+    
+    columns, deadline = args
+    return analyze_shard(_analyzer, columns, deadline)
+
+def shard_columns(texts_by_column, shards):
+    """Split {column: texts} into up to `shards` contiguous [(column, texts)] lists of similar size"""
+    total = sum(len(texts) for texts in texts_by_column.values())
+    size = max(1, -(-total // shards))
+    
+    result = [[]]
+    room = size
+    for column, texts in texts_by_column.items():
+        start = 0
+        while start < len(texts):
+            if not room:
+                result.append([])
+                room = size
+            end = start + min(room, len(texts) - start)
+            result[-1].append((column, texts[start:end]))
+            room -= end - start
+            start = end
+    return [shard for shard in result if shard]
+
+class InferencePool:
+    """Forked worker processes that score, explain and aggregate shards of a chunk
+    
+    Models are loaded in the parent before forking so every worker reads the same
+    weights copy-on-write instead of loading its own copy; gc.freeze() keeps the
+    collector from touching (and so copying) the inherited objects.
+    """
+    
+    def __init__(self, analyzer, workers, threads=None):
+        self.workers = workers
+        self.threads = threads or threads_per_worker(workers)
+        
+        # Load everything the workers use so they inherit it instead of loading their own copies
+        analyzer.sentiment_engine
+        analyzer.sentence_model
+        analyzer.rag_knowledge_base
+        if analyzer.attributions:
+            analyzer.token_attributor
+        
+        gc.collect()
+        gc.freeze()
+        try:
+            # With fork, initargs are inherited rather than pickled, and the pool keeps them to
+            # initialize replacement workers with this pool's analyzer
+            context = multiprocessing.get_context('fork')
+            self.pool = context.Pool(workers, initializer=_init_worker, initargs=(analyzer, self.threads))
+        finally:
+            gc.unfreeze()
+        print(f"[v0] Started {workers} inference workers with {self.threads} threads each")
+    
+    @classmethod
+    def start(cls, analyzer, workers, threads=None):
+        """Pool for analyzer, or None where fork isn't available and inference stays in-process"""
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            print("[v0] Inference workers need fork(); running inference in-process")
+            return None
+        return cls(analyzer, workers, threads)
+    
+    def analyze(self, texts_by_column, deadline=None):
+        """Shard results in order, each as returned by pipeline.analyze_shard
+        
+        deadline is a perf_counter() time; it's CLOCK_MONOTONIC, which forked workers share on Linux.
+        """
+        shards = shard_columns(texts_by_column, self.workers)
+        return self.pool.map(_analyze_shard, [(shard, deadline) for shard in shards])
+    
+    def close(self):
+        self.pool.close()
+        self.pool.join()